@@ -4,9 +4,16 @@ Uses pydantic-settings to enforce typing and defaults.
 """
 
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import Any, List
+
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings
 
+_BASE_DIR = os.path.dirname(__file__)
+_ENV_FILE = os.path.join(_BASE_DIR, ".env")
+
 
 class Settings(BaseSettings):
     """Global application settings sourced from .env file."""
@@ -14,49 +21,177 @@ class Settings(BaseSettings):
     app_env: str = "development"
     data_dir: str = "data"
     biometrics_file: str = "students_biometrics.json"
+    biometrics_matrix_file: str = "students_biometrics.npy"
     attendance_csv: str = "attendance_logs.csv"
     max_upload_size_mb: int = 100
     unknown_faces_dirname: str = "unknown_faces"
     temp_video_dirname: str = "temp_videos"
     jobs_file: str = "processing_jobs.json"
     face_match_threshold: float = 0.5
+    # Detect enrollment and video faces with dlib's CNN model in batches
+    # (batch_face_locations); only worthwhile with a CUDA build of dlib.
+    use_gpu_batch: bool = False
+    # Ask OpenCV's FFmpeg backend to decode videos on the GPU (NVDEC,
+    # VA-API, D3D11...) when the build supports it; falls back to CPU.
+    use_hw_video_decode: bool = False
+    # Worker processes decoding + encoding enrollment images on the CPU path
+    encode_workers: int = max(1, (os.cpu_count() or 2) // 2)
     frames_per_second_to_process: int = 2
+    # Skip a sampled frame whose 64-bit difference hash matches the last
+    # analysed frame's (a static scene): it would only find the same faces
+    skip_duplicate_frames: bool = True
+    # Seek (CAP_PROP_POS_FRAMES) to each sampled frame instead of grabbing
+    # every frame. FFmpeg decodes forward from the previous keyframe on
+    # every seek, so this only pays off when keyframes are closer together
+    # than the frame skip (e.g. all-intra MJPEG); with typical 60–250
+    # frame GOPs it decodes more frames than grabbing does.
+    seek_to_sampled_frames: bool = False
+    # Worker processes running process_video(), and the most jobs
+    # (running + waiting) accepted before uploads get HTTP 429.
+    max_concurrent_jobs: int = max(1, (os.cpu_count() or 2) - 1)
+    max_queued_jobs: int = 8
+    # Uploads copied to disk at once, and the most allowed to wait for
+    # a slot before new uploads get HTTP 503.
+    max_concurrent_upload_writes: int = 2
+    max_pending_uploads: int = 16
     current_academic_year: int = 2026
     cors_origins: str = "http://localhost:3000,https://lookinportal.vercel.app"
 
+    # Derived paths, resolved once in ``model_post_init``
+    _data_path: Path = PrivateAttr()
+    _biometrics_path: Path = PrivateAttr()
+    _biometrics_matrix_path: Path = PrivateAttr()
+    _attendance_csv_path: Path = PrivateAttr()
+    _unknown_faces_dir: Path = PrivateAttr()
+    _temp_video_dir: Path = PrivateAttr()
+    _jobs_path: Path = PrivateAttr()
+
+    # Plain-string twins of the paths above, for callers that only
+    # need an ``os``-level path (open(), os.stat(), StaticFiles, pandas).
+    _data_path_str: str = PrivateAttr()
+    _biometrics_path_str: str = PrivateAttr()
+    _biometrics_matrix_path_str: str = PrivateAttr()
+    _attendance_csv_path_str: str = PrivateAttr()
+    _unknown_faces_dir_str: str = PrivateAttr()
+    _temp_video_dir_str: str = PrivateAttr()
+    _jobs_path_str: str = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        """Build every derived path once, right after validation."""
+        data_dir_str = os.path.join(_BASE_DIR, self.data_dir)
+        self._data_path_str = data_dir_str
+        self._biometrics_path_str = os.path.join(data_dir_str, self.biometrics_file)
+        self._biometrics_matrix_path_str = os.path.join(
+            data_dir_str, self.biometrics_matrix_file
+        )
+        self._attendance_csv_path_str = os.path.join(data_dir_str, self.attendance_csv)
+        self._unknown_faces_dir_str = os.path.join(data_dir_str, self.unknown_faces_dirname)
+        self._temp_video_dir_str = os.path.join(data_dir_str, self.temp_video_dirname)
+        self._jobs_path_str = os.path.join(data_dir_str, self.jobs_file)
+
+        self._data_path = Path(self._data_path_str)
+        self._biometrics_path = Path(self._biometrics_path_str)
+        self._biometrics_matrix_path = Path(self._biometrics_matrix_path_str)
+        self._attendance_csv_path = Path(self._attendance_csv_path_str)
+        self._unknown_faces_dir = Path(self._unknown_faces_dir_str)
+        self._temp_video_dir = Path(self._temp_video_dir_str)
+        self._jobs_path = Path(self._jobs_path_str)
+
     @property
     def data_path(self) -> Path:
         """Return the absolute path to the data directory."""
-        return Path(__file__).parent / self.data_dir
+        return self._data_path
 
     @property
     def biometrics_path(self) -> Path:
         """Return the absolute path to the biometrics JSON file."""
-        return self.data_path / self.biometrics_file
+        return self._biometrics_path
+
+    @property
+    def biometrics_matrix_path(self) -> Path:
+        """Return the absolute path to the face-encoding matrix (.npy) file."""
+        return self._biometrics_matrix_path
 
     @property
     def attendance_csv_path(self) -> Path:
         """Return the absolute path to the attendance CSV file."""
-        return self.data_path / self.attendance_csv
+        return self._attendance_csv_path
 
     @property
     def unknown_faces_dir(self) -> Path:
         """Return the absolute path to the unknown faces image directory."""
-        return self.data_path / self.unknown_faces_dirname
+        return self._unknown_faces_dir
 
     @property
     def temp_video_dir(self) -> Path:
         """Return the absolute path to temporary video upload storage."""
-        return self.data_path / self.temp_video_dirname
+        return self._temp_video_dir
 
     @property
     def jobs_path(self) -> Path:
         """Return the absolute path to the processing jobs JSON file."""
-        return self.data_path / self.jobs_file
+        return self._jobs_path
+
+    @cached_property
+    def cors_origins_list(self) -> List[str]:
+        """Return ``cors_origins`` split into a list of non-empty origins."""
+        return [
+            origin.strip()
+            for origin in self.cors_origins.split(",")
+            if origin.strip()
+        ]
+
+    @property
+    def data_path_str(self) -> str:
+        """``data_path`` as a plain string."""
+        return self._data_path_str
+
+    @property
+    def biometrics_path_str(self) -> str:
+        """``biometrics_path`` as a plain string."""
+        return self._biometrics_path_str
+
+    @property
+    def biometrics_matrix_path_str(self) -> str:
+        """``biometrics_matrix_path`` as a plain string."""
+        return self._biometrics_matrix_path_str
+
+    @property
+    def attendance_csv_path_str(self) -> str:
+        """``attendance_csv_path`` as a plain string."""
+        return self._attendance_csv_path_str
+
+    @property
+    def unknown_faces_dir_str(self) -> str:
+        """``unknown_faces_dir`` as a plain string."""
+        return self._unknown_faces_dir_str
+
+    @property
+    def temp_video_dir_str(self) -> str:
+        """``temp_video_dir`` as a plain string."""
+        return self._temp_video_dir_str
+
+    @property
+    def jobs_path_str(self) -> str:
+        """``jobs_path`` as a plain string."""
+        return self._jobs_path_str
 
     class Config:
-        env_file = os.path.join(os.path.dirname(__file__), ".env")
+        # Skip the .env lookup entirely when the file is absent
+        # (e.g. in Docker, where variables come from the environment).
+        env_file = _ENV_FILE if os.path.exists(_ENV_FILE) else None
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide ``Settings`` instance.
+
+    Construction (reading ``.env`` and validating every field) happens
+    only on the first call; later calls return the cached object.
+    """
+    return Settings()
+
+
+settings = get_settings()
@@ -7,33 +7,125 @@ Run with:
     uvicorn main:app --reload --host 0.0.0.0 --port 8000
 """
 
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from config import settings
 from routes.admin import router as admin_router
 from routes.attendance import router as attendance_router
+from routes.attendance import shutdown_processing_pool
 from routes.enroll import router as enroll_router
-from utils.csv_handler import initialize_csv
+from routes.enroll import shutdown_encoding_pool
+from utils.csv_handler import close_attendance_log, initialize_csv
+from utils.job_store import compact_jobs, fail_interrupted_jobs
+
+
+def ensure_dirs() -> None:
+    """Create every data directory the application writes into."""
+    for directory in (
+        settings.data_path_str,
+        settings.unknown_faces_dir_str,
+        settings.temp_video_dir_str,
+    ):
+        os.makedirs(directory, exist_ok=True)
+
+
+# Runs once at import: StaticFiles checks its directory at init time,
+# which is before the lifespan runs on a fresh installation.
+ensure_dirs()
+
+
+# Allowance for multipart boundaries and form fields on top of the file
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+class MaxBodySizeMiddleware:
+    """
+    Reject any request whose declared ``Content-Length`` exceeds
+    *max_body_bytes* with HTTP 413, before a single body byte is read.
+
+    Requests without a ``Content-Length`` (chunked uploads) pass through;
+    the upload endpoint still enforces the limit while streaming.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        # The rejection body never changes, so build it once
+        self.too_large_body = {
+            "success": False,
+            "error": "File too large",
+            "detail": (
+                f"Request body exceeds the "
+                f"{settings.max_upload_size_mb} MB limit."
+            ),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for header_name, header_value in scope["headers"]:
+                if header_name != b"content-length":
+                    continue
+                try:
+                    declared_length = int(header_value)
+                except ValueError:
+                    break
+                if declared_length > self.max_body_bytes:
+                    response = JSONResponse(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        content=self.too_large_body,
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+        await self.app(scope, receive, send)
+
+
+# One year — the longest max-age caches are expected to honour
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    ``StaticFiles`` for the unknown-face crops, marked cacheable forever.
+
+    Every crop gets a unique filename (timestamp, index, per-job token)
+    and is never rewritten, so browsers can keep thumbnails without
+    revalidating. ETag / Last-Modified still come from ``FileResponse``.
+    """
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     """
     Startup / shutdown lifecycle hook.
-    Ensures all required data files and directories exist
-    before the first request.
+    Ensures the attendance CSV exists before the first request
+    (data directories are created by ``ensure_dirs()`` at import) and
+    fails jobs a previous run left unfinished.
     """
     # ── Startup ──
-    settings.data_path.mkdir(parents=True, exist_ok=True)
-    settings.unknown_faces_dir.mkdir(parents=True, exist_ok=True)
-    settings.temp_video_dir.mkdir(parents=True, exist_ok=True)
     initialize_csv()
+    fail_interrupted_jobs()
     yield
-    # ── Shutdown ── (nothing to clean up for now)
+    # ── Shutdown ── stop video / encoding workers, close the attendance
+    # log, fold the job WAL into the snapshot
+    shutdown_processing_pool()
+    shutdown_encoding_pool()
+    close_attendance_log()
+    compact_jobs()
 
 
 app = FastAPI(
@@ -43,28 +135,56 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# ── Errors: flatten dict details into a top-level ErrorResponse body ──
+@app.exception_handler(HTTPException)
+async def structured_http_exception_handler(
+    request: Request,
+    exc: HTTPException,
+) -> JSONResponse:
+    """
+    Render ``HTTPException``s raised with a plain-dict ``detail`` as a
+    top-level ``ErrorResponse``-shaped body. Routes raise with cheap dict
+    literals, and no Pydantic model is built on the error path.
+    Anything else falls through to FastAPI's default handler.
+    """
+    if isinstance(exc.detail, dict) and "error" in exc.detail:
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={
+                "success": False,
+                "error": exc.detail["error"],
+                "detail": exc.detail.get("detail"),
+            },
+            headers=exc.headers,
+        )
+    return await http_exception_handler(request, exc)
+
+
+# ── Request size: refuse oversized bodies from the headers alone ──
+# Added before CORS so CORS stays outermost and 413s carry its headers.
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    max_body_bytes=(
+        settings.max_upload_size_mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+    ),
+)
+
+# ── Compression: the roster / unknown-face listings are large, repetitive JSON ──
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # ── CORS (allow configured origins + Vercel deployment) ──
-allowed_origins = [
-    origin.strip()
-    for origin in settings.cors_origins.split(",")
-    if origin.strip()
-]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=allowed_origins,
+    allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 # ── Static Files: serve unknown face crops to the frontend ──
-# Ensure the directory exists before mounting (StaticFiles checks at init time,
-# which is before the lifespan creates it on a fresh installation).
-settings.unknown_faces_dir.mkdir(parents=True, exist_ok=True)
-
 app.mount(
     "/static/unknown_faces",
-    StaticFiles(directory=str(settings.unknown_faces_dir)),
+    ImmutableStaticFiles(directory=settings.unknown_faces_dir_str),
     name="unknown_faces",
 )
 
@@ -4,9 +4,17 @@ across all API endpoints.
 """
 
 import datetime as dt
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Shared config for read-only response models that are built in bulk
+# (one per roster row / unknown face / status poll).
+_RESPONSE_MODEL_CONFIG = ConfigDict(
+    frozen=True,
+    extra="ignore",
+    validate_assignment=False,
+)
 
 
 # ──────────────────────────────────────────────
@@ -93,19 +101,46 @@ class ErrorResponse(BaseModel):
 
 class AttendanceRecord(BaseModel):
     """A single attendance log row."""
+    model_config = _RESPONSE_MODEL_CONFIG
+
     student_id: str
     student_name: str
     division: Optional[str] = None
-    date: dt.date
+    date: str = Field(
+        ...,
+        description="Attendance date as an ISO string (YYYY-MM-DD).",
+    )
     time: str
     status: str = Field(
         default="present",
         description="Attendance status, e.g. 'present' or 'absent'.",
     )
 
+    @field_validator("date", mode="before")
+    @classmethod
+    def _check_date(cls, value: object) -> str:
+        """Accept a ``date`` or an already formatted ``YYYY-MM-DD`` string."""
+        if isinstance(value, dt.date):
+            return value.isoformat()
+        # fromisoformat alone would also take e.g. "20250610" on 3.11+
+        if (
+            not isinstance(value, str)
+            or len(value) != 10
+            or value[4] != "-"
+            or value[7] != "-"
+        ):
+            raise ValueError("date must be in YYYY-MM-DD format")
+        try:
+            dt.date.fromisoformat(value)
+        except ValueError:
+            raise ValueError("date must be a valid YYYY-MM-DD date") from None
+        return value
+
 
 class DailyRosterResponse(BaseModel):
     """Response containing the full attendance roster for a given day."""
+    model_config = _RESPONSE_MODEL_CONFIG
+
     success: bool = True
     date: dt.date
     total_records: int
@@ -134,7 +169,9 @@ class VideoUploadResponse(BaseModel):
 
 
 class JobStatusResponse(BaseModel):
-    """Response from the job-status polling endpoint."""
+    """Job status, as returned by the job-status endpoint and WebSocket."""
+    model_config = _RESPONSE_MODEL_CONFIG
+
     status: str = Field(
         ...,
         description="One of: processing, completed, failed.",
@@ -153,6 +190,8 @@ class JobStatusResponse(BaseModel):
 
 class UnknownFaceEntry(BaseModel):
     """Represents a single cropped unknown-face image."""
+    model_config = _RESPONSE_MODEL_CONFIG
+
     filename: str = Field(
         ...,
         description="Name of the image file on disk.",
@@ -169,6 +208,8 @@ class UnknownFaceEntry(BaseModel):
 
 class UnknownFacesListResponse(BaseModel):
     """Response listing all cropped unknown face images."""
+    model_config = _RESPONSE_MODEL_CONFIG
+
     success: bool = True
     total_count: int
     faces: List[UnknownFaceEntry]
@@ -187,7 +228,10 @@ class VideoProcessingResult(BaseModel):
     students_matched: int = 0
     unknown_faces_saved: int = 0
     errors: List[str] = Field(default_factory=list)
-    completed_at: Optional[dt.datetime] = None
+    completed_at: Optional[str] = Field(
+        default=None,
+        description="UTC completion time as an ISO string, set once on finish.",
+    )
 
 
 # ──────────────────────────────────────────────
@@ -220,9 +264,8 @@ class ManualOverrideRequest(BaseModel):
         ...,
         description="The attendance date (YYYY-MM-DD).",
     )
-    status: str = Field(
+    status: Literal["present", "absent"] = Field(
         default="present",
-        pattern="^(present|absent)$",
         description="Attendance status — 'present' or 'absent'.",
     )
 
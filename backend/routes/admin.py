@@ -10,7 +10,10 @@ Endpoints:
 
 from __future__ import annotations
 
+import logging
+
 from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
 from models.schemas import (
     AlumniCleanupRequest,
@@ -21,6 +24,13 @@ from utils.alumni_cleanup import remove_alumni
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+logger = logging.getLogger("admin")
+logger.setLevel(logging.INFO)
+
+# Static part of the error body raised below; the raise adds only its
+# "detail" (main.py's HTTPException handler renders the dict as-is)
+_ERROR_ALUMNI_CLEANUP_FAILED = {"success": False, "error": "Alumni cleanup failed"}
+
 
 # ──────────────────────────────────────────────
 #  POST /alumni-cleanup
@@ -50,20 +60,24 @@ async def alumni_cleanup(
 
     Workflow:
     1. Validate the cutoff year.
-    2. Delegate to ``remove_alumni()`` which filters and persists.
+    2. Delegate to ``remove_alumni()`` which filters and persists
+       (run in the threadpool so the file rewrite doesn't block the
+       event loop).
     3. Return a summary of removed students.
     """
     try:
-        result = remove_alumni(
+        result = await run_in_threadpool(
+            remove_alumni,
             graduation_year_cutoff=payload.graduation_year_cutoff,
         )
     except Exception as cleanup_error:
+        logger.exception("Alumni cleanup failed")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=ErrorResponse(
-                error="Alumni cleanup failed",
-                detail=f"An unexpected error occurred: {cleanup_error}",
-            ).model_dump(),
+            detail={
+                **_ERROR_ALUMNI_CLEANUP_FAILED,
+                "detail": f"An unexpected error occurred: {cleanup_error!s}",
+            },
         )
 
     return result
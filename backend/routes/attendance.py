@@ -9,25 +9,38 @@ Endpoints:
     GET  /unknown-faces    — List all cropped unknown face images.
     GET  /daily-roster     — Fetch the attendance roster for a given date.
     GET  /job-status/{id}  — Poll the processing status of an upload job.
+    WS   /job-status/ws/{id} — Receive status updates for a job as they happen.
+    POST /manual-override  — Manually mark a student present or absent.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
 import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
 from datetime import date, datetime
-from pathlib import Path
-from typing import List, Optional
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     File,
     HTTPException,
     Query,
+    Request,
+    Response,
     UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
     status,
 )
+from fastapi.concurrency import run_in_threadpool
+from starlette.formparsers import MultiPartParser
 
 from config import settings
 from models.schemas import (
@@ -42,12 +55,18 @@ from models.schemas import (
     VideoUploadResponse,
 )
 from utils.csv_handler import fetch_daily_roster, manual_override_attendance
+from utils.job_store import (
+    INTERRUPTED_JOB_ERROR,
+    find_job_by_content_hash,
+    get_job,
+    save_job,
+)
 from utils.vision_engine import process_video
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
 # Allowed video MIME types
-ALLOWED_VIDEO_CONTENT_TYPES = {
+ALLOWED_VIDEO_CONTENT_TYPES = frozenset({
     "video/mp4",
     "video/mpeg",
     "video/x-msvideo",   # .avi
@@ -57,46 +76,334 @@ ALLOWED_VIDEO_CONTENT_TYPES = {
     "video/x-m4v",
     "video/3gpp",
     "application/octet-stream",  # fallback: some browsers send this
-}
+})
 
 # Extension-based fallback for content-type validation
-ALLOWED_VIDEO_EXTENSIONS = {
+ALLOWED_VIDEO_EXTENSIONS = frozenset({
     ".mp4", ".mpeg", ".mpg", ".avi", ".mov",
     ".mkv", ".webm", ".m4v", ".3gp", ".wmv",
-}
+})
+
+# Image types listed by /unknown-faces (lower-case, without the dot)
+ALLOWED_IMAGE_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "bmp"})
+
+# Bytes read from the upload per iteration when streaming it to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Static part of each error body raised below; a raise adds only its
+# "detail" (main.py's HTTPException handler renders the dict as-is)
+_ERROR_TOO_MANY_JOBS = {"success": False, "error": "Too many jobs"}
+_ERROR_INVALID_FILE_TYPE = {"success": False, "error": "Invalid file type"}
+_ERROR_SERVER_BUSY = {"success": False, "error": "Server busy"}
+_ERROR_FILE_SAVE_ERROR = {"success": False, "error": "File save error"}
+_ERROR_FILE_TOO_LARGE = {"success": False, "error": "File too large"}
+_ERROR_EMPTY_FILE = {"success": False, "error": "Empty file"}
+_ERROR_JOB_NOT_FOUND = {"success": False, "error": "Job not found"}
+_ERROR_INVALID_DATE_FORMAT = {"success": False, "error": "Invalid date format"}
+_ERROR_OVERRIDE_FAILED = {"success": False, "error": "Override failed"}
+
+# Worker processes for process_video(); created on the first upload
+_processing_pool: Optional[ProcessPoolExecutor] = None
+_processing_pool_lock = threading.Lock()
+
+# Jobs handed to the pool that haven't finished yet (running or queued)
+_in_flight_job_count: int = 0
+# IDs of those jobs: a "processing" record is only live if listed here
+_in_flight_job_ids: Set[str] = set()
+
+# Caps concurrent upload copies so simultaneous uploads don't fight
+# over disk bandwidth; the counter includes uploads waiting for a slot.
+_upload_write_slots = asyncio.Semaphore(settings.max_concurrent_upload_writes)
+_pending_upload_writes: int = 0
+
+# job_id → (event loop, queue) for every open status WebSocket. Updates
+# are published from worker threads, hence the lock and
+# call_soon_threadsafe when delivering.
+_job_subscribers: Dict[
+    str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]
+] = {}
+_job_subscribers_lock = threading.Lock()
 
 
 # ──────────────────────────────────────────────
 #  Job Tracking Helpers
 # ──────────────────────────────────────────────
 
-def _load_jobs() -> dict:
-    """Load the processing jobs JSON file."""
-    jobs_path = settings.jobs_path
-    if not jobs_path.exists() or jobs_path.stat().st_size == 0:
-        return {}
-    return json.loads(jobs_path.read_text(encoding="utf-8"))
+def _copy_upload_to_disk(
+    source_file: BinaryIO,
+    upload_size: Optional[int],
+    destination_path: str,
+    max_bytes: int,
+) -> Tuple[int, str]:
+    """
+    Copy an upload to *destination_path* without holding it in memory,
+    hashing its content along the way.
+
+    When Starlette has already spooled the upload to a temporary file on
+    disk, the copy is done in-kernel with ``os.sendfile``; otherwise it
+    falls back to a chunked read/write loop. Either way the copy stops
+    as soon as more than *max_bytes* have been seen. *upload_size* is
+    ``UploadFile.size`` (``None`` if unknown).
+
+    Returns:
+        ``(size, content_hash)`` — the size of the upload in bytes
+        (greater than *max_bytes* if the limit was exceeded, in which
+        case the copy is incomplete) and the hex BLAKE2b digest of the
+        bytes written.
+    """
+    source_fd = _spooled_file_descriptor(source_file, upload_size)
+    if source_fd is not None and hasattr(os, "sendfile"):
+        return _sendfile_to_disk(source_fd, destination_path, max_bytes)
+
+    content_hasher = hashlib.blake2b()
+    total_bytes_read = 0
+    with open(destination_path, "wb") as destination_file:
+        while chunk := source_file.read(UPLOAD_CHUNK_SIZE):
+            total_bytes_read += len(chunk)
+            if total_bytes_read > max_bytes:
+                break
+            content_hasher.update(chunk)
+            destination_file.write(chunk)
+    return total_bytes_read, content_hasher.hexdigest()
+
+
+def _spooled_file_descriptor(
+    source_file: BinaryIO,
+    upload_size: Optional[int],
+) -> Optional[int]:
+    """
+    Return the OS file descriptor behind an upload, or ``None`` if it
+    is still held in memory (or its size is unknown).
+
+    ``SpooledTemporaryFile.fileno()`` forces an in-memory upload out to
+    disk, so it is only called for uploads larger than the parser's
+    ``spool_max_size``, which the spool has already rolled over.
+    """
+    if upload_size is None or upload_size <= MultiPartParser.spool_max_size:
+        return None
+    try:
+        return source_file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _sendfile_to_disk(
+    source_fd: int,
+    destination_path: str,
+    max_bytes: int,
+) -> Tuple[int, str]:
+    """
+    Copy the whole of *source_fd* to *destination_path* with
+    ``os.sendfile`` so the bytes never pass through Python.
+
+    The size is known up front, so an oversized upload is rejected
+    before anything is written. The content hash is taken with
+    ``os.pread`` from the spooled file, which leaves its offset alone.
+
+    Returns:
+        ``(size, content_hash)`` — the number of bytes copied, or the
+        upload's size with an empty hash if it exceeds *max_bytes*
+        (nothing is written then), and the BLAKE2b hex digest of the
+        bytes copied.
+    """
+    total_bytes = os.fstat(source_fd).st_size
+    if total_bytes > max_bytes:
+        return total_bytes, ""
+
+    bytes_copied = 0
+    with open(destination_path, "wb") as destination_file:
+        destination_fd = destination_file.fileno()
+        while bytes_copied < total_bytes:
+            bytes_sent = os.sendfile(
+                destination_fd,
+                source_fd,
+                bytes_copied,
+                total_bytes - bytes_copied,
+            )
+            if bytes_sent == 0:
+                break
+            bytes_copied += bytes_sent
+
+    content_hasher = hashlib.blake2b()
+    hashed_offset = 0
+    while hashed_offset < bytes_copied:
+        chunk = os.pread(
+            source_fd,
+            min(UPLOAD_CHUNK_SIZE, bytes_copied - hashed_offset),
+            hashed_offset,
+        )
+        if not chunk:
+            break
+        content_hasher.update(chunk)
+        hashed_offset += len(chunk)
+    return bytes_copied, content_hasher.hexdigest()
+
+
+def _remove_file_if_exists(file_path: str) -> None:
+    """Delete a partial or duplicate upload; a missing file is fine."""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def _get_processing_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared worker pool for ``process_video()``, creating it
+    on first use.
+
+    Workers are separate processes so the OpenCV / dlib pipeline runs
+    on its own cores, outside this process's GIL and event loop.
+    ``spawn`` is used so workers don't inherit the server's threads
+    and locks.
+    """
+    global _processing_pool
+    with _processing_pool_lock:
+        if _processing_pool is None:
+            _processing_pool = ProcessPoolExecutor(
+                max_workers=settings.max_concurrent_jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _processing_pool
+
+
+def shutdown_processing_pool() -> None:
+    """
+    Stop the worker pool, cancelling jobs that haven't started yet, and
+    mark every job still in flight as failed.
+
+    Nothing waits for running jobs (``wait=False``), so without this
+    their records would stay "processing". A job that still finishes
+    before the process exits overwrites the mark with its real result:
+    its done callback blocks on ``_processing_pool_lock`` until the
+    marks are written.
+    """
+    global _processing_pool
+    with _processing_pool_lock:
+        processing_pool, _processing_pool = _processing_pool, None
+    # Outside the lock: cancelling runs done callbacks, which take it.
+    if processing_pool is not None:
+        processing_pool.shutdown(wait=False, cancel_futures=True)
+
+    with _processing_pool_lock:
+        for job_id in _in_flight_job_ids:
+            job_data = get_job(job_id) or {}
+            _save_and_publish_job(job_id, {
+                "status": "failed",
+                "video_filename": job_data.get("video_filename"),
+                "error": INTERRUPTED_JOB_ERROR,
+                "completed_at": datetime.now().isoformat(),
+                "content_hash": job_data.get("content_hash"),
+            })
+
+
+def _save_and_publish_job(job_id: str, job_data: dict) -> None:
+    """Persist a job update and push it to any open status WebSockets."""
+    save_job(job_id, job_data)
+
+    with _job_subscribers_lock:
+        subscribers = list(_job_subscribers.get(job_id, ()))
+    for subscriber_loop, update_queue in subscribers:
+        try:
+            subscriber_loop.call_soon_threadsafe(update_queue.put_nowait, job_data)
+        except RuntimeError:
+            # The subscriber's event loop has already shut down.
+            pass
+
+
+def _reserve_job_slot() -> bool:
+    """
+    Claim one of the ``max_queued_jobs`` in-flight slots. Returns False
+    when all are taken. Check and increment happen under one lock, so a
+    burst of uploads can't all pass the limit together.
+    """
+    global _in_flight_job_count
+    with _processing_pool_lock:
+        if _in_flight_job_count >= settings.max_queued_jobs:
+            return False
+        _in_flight_job_count += 1
+        return True
 
 
-def _save_job(job_id: str, job_data: dict) -> None:
-    """Save or update a single job in the jobs store."""
-    jobs_path = settings.jobs_path
-    jobs_path.parent.mkdir(parents=True, exist_ok=True)
-    all_jobs = _load_jobs()
-    all_jobs[job_id] = job_data
-    jobs_path.write_text(json.dumps(all_jobs, indent=2, default=str), encoding="utf-8")
+def _release_job_slot() -> None:
+    """Give back a slot taken by ``_reserve_job_slot()``."""
+    global _in_flight_job_count
+    with _processing_pool_lock:
+        _in_flight_job_count -= 1
 
 
-def _run_and_track(job_id: str, video_path: str) -> None:
-    """Wrapper that runs process_video and persists the result."""
-    _save_job(job_id, {
+def _run_and_track(job_id: str, video_path: str, content_hash: str) -> None:
+    """
+    Record the job as processing, submit ``process_video`` to the worker
+    pool and persist the result once it finishes. Returns as soon as the
+    job is queued.
+
+    Called from the upload endpoint before it responds, so the job and
+    its content hash are on record before a re-upload can look for them.
+    Takes over the slot the endpoint reserved; ``_record_job_outcome()``
+    releases it. If the initial save raises, the slot is still the
+    caller's to release.
+    """
+    _save_and_publish_job(job_id, {
         "status": "processing",
         "started_at": datetime.now().isoformat(),
-        "video_filename": Path(video_path).name,
+        "video_filename": os.path.basename(video_path),
+        "content_hash": content_hash,
     })
+
+    with _processing_pool_lock:
+        _in_flight_job_ids.add(job_id)
+
+    try:
+        future = _get_processing_pool().submit(process_video, video_path)
+    except Exception as exc:
+        _record_job_outcome(job_id, content_hash, error=exc)
+        return
+
+    future.add_done_callback(
+        lambda finished: _record_job_outcome(
+            job_id, content_hash, future=finished
+        )
+    )
+
+
+def _is_reusable_job(job_id: str) -> bool:
+    """
+    Whether a re-upload of the same video can be answered with *job_id*:
+    it completed, or it is still queued / running in this process. Failed
+    jobs are retried, and a "processing" record no live job stands behind
+    would never finish.
+    """
+    job_data = get_job(job_id)
+    if job_data is None:
+        return False
+    if job_data.get("status") == "completed":
+        return True
+    with _processing_pool_lock:
+        return job_data.get("status") == "processing" and job_id in _in_flight_job_ids
+
+
+def _record_job_outcome(
+    job_id: str,
+    content_hash: str,
+    future: Optional[Future] = None,
+    error: Optional[BaseException] = None,
+) -> None:
+    """
+    Persist the final state of a job and release its in-flight slot.
+
+    The upload's *content_hash* is kept on the record so re-uploads of
+    the same video still resolve to this job after a restart.
+    """
+    with _processing_pool_lock:
+        _in_flight_job_ids.discard(job_id)
+    _release_job_slot()
+
     try:
-        result = process_video(video_path)
-        _save_job(job_id, {
+        if error is not None:
+            raise error
+        result = future.result()
+        _save_and_publish_job(job_id, {
             "status": "completed",
             "video_filename": result.video_filename,
             "total_frames_read": result.total_frames_read,
@@ -105,13 +412,23 @@ def _run_and_track(job_id: str, video_path: str) -> None:
             "students_matched": result.students_matched,
             "unknown_faces_saved": result.unknown_faces_saved,
             "errors": result.errors,
-            "completed_at": (result.completed_at or datetime.now()).isoformat(),
+            "completed_at": result.completed_at or datetime.now().isoformat(),
+            "content_hash": content_hash,
+        })
+    except CancelledError:
+        # Still queued when shutdown_processing_pool() cancelled it
+        _save_and_publish_job(job_id, {
+            "status": "failed",
+            "error": INTERRUPTED_JOB_ERROR,
+            "completed_at": datetime.now().isoformat(),
+            "content_hash": content_hash,
         })
     except Exception as exc:
-        _save_job(job_id, {
+        _save_and_publish_job(job_id, {
             "status": "failed",
-            "error": str(exc),
+            "error": str(exc) or type(exc).__name__,
             "completed_at": datetime.now().isoformat(),
+            "content_hash": content_hash,
         })
 
 
@@ -127,7 +444,9 @@ def _run_and_track(job_id: str, video_path: str) -> None:
     responses={
         400: {"model": ErrorResponse},
         413: {"model": ErrorResponse},
+        429: {"model": ErrorResponse},
         500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
     },
     summary="Upload a class video for batch attendance processing",
     description=(
@@ -137,7 +456,6 @@ def _run_and_track(job_id: str, video_path: str) -> None:
     ),
 )
 async def upload_video_for_processing(
-    background_tasks: BackgroundTasks,
     video: UploadFile = File(
         ...,
         description="A class video file (MP4, AVI, MOV, MKV, or WebM).",
@@ -147,81 +465,164 @@ async def upload_video_for_processing(
     **Admin-only** endpoint to initiate batch video processing.
 
     Workflow:
-    1. Validate the upload (content type, file size).
-    2. Save the video to a temporary directory.
-    3. Enqueue ``process_video()`` as a FastAPI ``BackgroundTask``.
-    4. Return HTTP 202 immediately.
+    1. Refuse new work (HTTP 429) while too many jobs are in flight.
+    2. Validate the upload content type.
+    3. Stream the video to a temporary directory, enforcing the size limit.
+    4. If an identical video already has a completed job, or one still
+       running in this process, discard the copy and return that job.
+    5. Record the job and hand ``process_video()`` to the worker pool
+       (``submit`` only queues it).
+    6. Return HTTP 202 immediately.
     """
 
+    # ── Back-pressure: don't pile up more jobs than we can work off ──
+    # The slot is taken before anything else, so concurrent uploads
+    # can't all slip past the limit while their copies are in progress.
+    if not _reserve_job_slot():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                **_ERROR_TOO_MANY_JOBS,
+                "detail": (
+                    f"{_in_flight_job_count} video(s) are already being "
+                    "processed. Please try again shortly."
+                ),
+            },
+            headers={"Retry-After": "30"},
+        )
+
+    try:
+        upload_response, job_started = await _save_upload_and_start_job(video)
+    except BaseException:
+        _release_job_slot()
+        raise
+    if not job_started:
+        _release_job_slot()
+    return upload_response
+
+
+async def _save_upload_and_start_job(
+    video: UploadFile,
+) -> Tuple[VideoUploadResponse, bool]:
+    """
+    Steps 2–5 of ``upload_video_for_processing()``, run while the caller
+    holds a job slot. The flag is True when a new job was started (it
+    now owns the slot), False when an existing job was returned.
+    """
     # ── Validate content type (with extension fallback) ────────
-    file_extension = (Path(video.filename).suffix.lower() if video.filename else "")
+    uploaded_extension = os.path.splitext(video.filename)[1] if video.filename else ""
+    file_extension = uploaded_extension.lower()
     content_type_ok = video.content_type in ALLOWED_VIDEO_CONTENT_TYPES
     extension_ok = file_extension in ALLOWED_VIDEO_EXTENSIONS
 
     if not content_type_ok and not extension_ok:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ErrorResponse(
-                error="Invalid file type",
-                detail=(
+            detail={
+                **_ERROR_INVALID_FILE_TYPE,
+                "detail": (
                     f"Content type '{video.content_type}' and extension "
                     f"'{file_extension}' are not supported. "
                     f"Allowed formats: MP4, AVI, MOV, MKV, WebM."
                 ),
-            ).model_dump(),
+            },
         )
 
-    # ── Read and validate file size ──────────────────────────────
+    # ── Stream to temporary directory, enforcing the size limit ──
     max_bytes = settings.max_upload_size_mb * 1024 * 1024
-    video_bytes = await video.read()
 
-    if len(video_bytes) > max_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=ErrorResponse(
-                error="File too large",
-                detail=(
-                    f"Uploaded video is {len(video_bytes) / (1024 * 1024):.1f} MB "
-                    f"but the limit is {settings.max_upload_size_mb} MB."
-                ),
-            ).model_dump(),
-        )
-
-    if len(video_bytes) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ErrorResponse(
-                error="Empty file",
-                detail="The uploaded video file is empty.",
-            ).model_dump(),
-        )
-
-    # ── Save to temporary directory ──────────────────────────────
-    temp_video_directory = settings.temp_video_dir
-    temp_video_directory.mkdir(parents=True, exist_ok=True)
+    temp_video_directory = settings.temp_video_dir_str
+    await run_in_threadpool(os.makedirs, temp_video_directory, exist_ok=True)
 
     # Generate a unique filename to avoid collisions
-    original_extension = Path(video.filename).suffix if video.filename else ".mp4"
+    original_extension = uploaded_extension if video.filename else ".mp4"
     unique_video_filename = (
         f"upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         f"_{uuid.uuid4().hex[:8]}{original_extension}"
     )
-    saved_video_path = temp_video_directory / unique_video_filename
+    saved_video_path = os.path.join(temp_video_directory, unique_video_filename)
+
+    # Too many uploads already queued for a disk slot — shed load.
+    global _pending_upload_writes
+    if _pending_upload_writes >= settings.max_pending_uploads:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                **_ERROR_SERVER_BUSY,
+                "detail": "Too many uploads are being saved. Please try again shortly.",
+            },
+            headers={"Retry-After": "10"},
+        )
 
+    # The copy runs in the threadpool so a multi-GB write doesn't stall
+    # other requests (status polls, roster GETs) on the event loop, and
+    # the semaphore caps how many copies hit the disk at once.
+    _pending_upload_writes += 1
     try:
-        saved_video_path.write_bytes(video_bytes)
+        async with _upload_write_slots:
+            total_bytes_written, content_hash = await run_in_threadpool(
+                _copy_upload_to_disk,
+                video.file,
+                video.size,
+                saved_video_path,
+                max_bytes,
+            )
     except OSError as write_error:
+        await run_in_threadpool(_remove_file_if_exists, saved_video_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=ErrorResponse(
-                error="File save error",
-                detail=f"Could not save video to disk: {write_error}",
-            ).model_dump(),
+            detail={
+                **_ERROR_FILE_SAVE_ERROR,
+                "detail": f"Could not save video to disk: {write_error}",
+            },
         )
+    finally:
+        _pending_upload_writes -= 1
+
+    if total_bytes_written > max_bytes:
+        await run_in_threadpool(_remove_file_if_exists, saved_video_path)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail={
+                **_ERROR_FILE_TOO_LARGE,
+                "detail": (
+                    f"Uploaded video exceeds the "
+                    f"{settings.max_upload_size_mb} MB limit."
+                ),
+            },
+        )
+
+    if total_bytes_written == 0:
+        await run_in_threadpool(_remove_file_if_exists, saved_video_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                **_ERROR_EMPTY_FILE,
+                "detail": "The uploaded video file is empty.",
+            },
+        )
+
+    # ── Same video already processed (or still running)? Reuse that job ──
+    existing_job_id = find_job_by_content_hash(content_hash)
+    if existing_job_id and _is_reusable_job(existing_job_id):
+        existing_job = get_job(existing_job_id)
+        await run_in_threadpool(_remove_file_if_exists, saved_video_path)
+        return VideoUploadResponse(
+            success=True,
+            message=(
+                "This video was already uploaded. Returning the existing "
+                "processing job instead of starting a new one."
+            ),
+            video_filename=existing_job.get("video_filename", unique_video_filename),
+            job_id=existing_job_id,
+        ), False
 
     # ── Trigger background processing ────────────────────────────
+    # Recorded before responding, with no await since the lookup above,
+    # so a second upload of the same video ("teacher clicks twice")
+    # finds this job instead of starting another one.
     job_id = uuid.uuid4().hex[:12]
-    background_tasks.add_task(_run_and_track, job_id, str(saved_video_path))
+    _run_and_track(job_id, saved_video_path, content_hash)
 
     return VideoUploadResponse(
         success=True,
@@ -231,7 +632,7 @@ async def upload_video_for_processing(
         ),
         video_filename=unique_video_filename,
         job_id=job_id,
-    )
+    ), True
 
 
 # ──────────────────────────────────────────────
@@ -247,21 +648,77 @@ async def upload_video_for_processing(
 )
 async def get_job_status(job_id: str) -> JobStatusResponse:
     """Return the current status of a background video processing job."""
-    all_jobs = _load_jobs()
-    job = all_jobs.get(job_id)
+    job = get_job(job_id)
 
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=ErrorResponse(
-                error="Job not found",
-                detail=f"No job exists with ID '{job_id}'.",
-            ).model_dump(),
+            detail={
+                **_ERROR_JOB_NOT_FOUND,
+                "detail": f"No job exists with ID '{job_id}'.",
+            },
         )
 
     return JobStatusResponse(**job)
 
 
+# ──────────────────────────────────────────────
+#  WS /job-status/ws/{job_id}
+# ──────────────────────────────────────────────
+
+# Statuses after which a job never changes again
+TERMINAL_JOB_STATUSES = frozenset({"completed", "failed"})
+
+
+@router.websocket("/job-status/ws/{job_id}")
+async def stream_job_status(websocket: WebSocket, job_id: str) -> None:
+    """
+    Push the status of a background video processing job over a
+    WebSocket instead of having the client poll ``GET /job-status``.
+
+    Sends the current status on connect and again on every change
+    (same JSON shape as the polling endpoint), then closes once the job
+    has completed or failed.
+    """
+    await websocket.accept()
+
+    update_queue: asyncio.Queue = asyncio.Queue()
+    subscriber = (asyncio.get_running_loop(), update_queue)
+    with _job_subscribers_lock:
+        _job_subscribers.setdefault(job_id, set()).add(subscriber)
+
+    try:
+        # Subscribed before reading, so an update landing now is queued
+        # rather than missed.
+        # The upload endpoint records a job before returning its ID, so
+        # an ID unknown here will never appear.
+        job = get_job(job_id)
+        if job is None:
+            await websocket.send_json({
+                **_ERROR_JOB_NOT_FOUND,
+                "detail": f"No job exists with ID '{job_id}'.",
+            })
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        while True:
+            await websocket.send_json(JobStatusResponse(**job).model_dump())
+            if job.get("status") in TERMINAL_JOB_STATUSES:
+                break
+            job = await update_queue.get()
+
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        with _job_subscribers_lock:
+            job_subscribers = _job_subscribers.get(job_id)
+            if job_subscribers is not None:
+                job_subscribers.discard(subscriber)
+                if not job_subscribers:
+                    del _job_subscribers[job_id]
+
+
 # ──────────────────────────────────────────────
 #  GET /unknown-faces
 # ──────────────────────────────────────────────
@@ -278,73 +735,196 @@ async def get_job_status(job_id: str) -> JobStatusResponse:
         "so the frontend can display them for manual review."
     ),
 )
-async def list_unknown_faces() -> UnknownFacesListResponse:
+async def list_unknown_faces(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=1000,
+        description="Maximum number of faces to return. Defaults to all.",
+    ),
+    offset: int = Query(
+        default=0,
+        ge=0,
+        description="Number of faces to skip (for pagination).",
+    ),
+) -> UnknownFacesListResponse:
     """
-    Scan the ``unknown_faces`` directory and return metadata for
-    each image found.
+    Return metadata for the images in the ``unknown_faces`` directory,
+    optionally paginated with ``limit`` / ``offset``.
+
+    Answers ``304 Not Modified`` when the client's ``If-None-Match``
+    still matches the directory's current set of images.
     """
-    unknown_faces_directory = settings.unknown_faces_dir
+    listing_digest, face_entries = _get_unknown_face_entries()
 
-    if not unknown_faces_directory.exists():
-        return UnknownFacesListResponse(
-            success=True,
-            total_count=0,
-            faces=[],
-        )
+    etag = _make_etag(listing_digest)
+    if _etag_matches(request, etag):
+        return _not_modified_response(etag)
+    _set_validator_headers(response, etag)
 
-    allowed_image_extensions = {".jpg", ".jpeg", ".png", ".bmp"}
+    page = (
+        face_entries[offset:offset + limit]
+        if limit is not None
+        else face_entries[offset:]
+    )
+
+    return UnknownFacesListResponse.model_construct(
+        success=True,
+        total_count=len(face_entries),
+        faces=page,
+    )
+
+
+# Listing cache: (digest of the sorted image filenames, sorted entries).
+# Keyed on the names rather than the directory's mtime, which can miss
+# a change: with coarse timestamps, an add and a delete within one tick
+# leave both the mtime and the file count as they were. Crops are never
+# rewritten in place, so the names are the whole listing's state.
+_unknown_faces_cache: Optional[Tuple[str, List[UnknownFaceEntry]]] = None
+
+
+def _get_unknown_face_entries() -> Tuple[str, List[UnknownFaceEntry]]:
+    """
+    Return a digest of the image filenames and every unknown-face image
+    as an ``UnknownFaceEntry``, sorted by filename (which includes the
+    timestamp, so chronological).
+
+    The directory is listed on every call, but the entries are only
+    rebuilt when the set of filenames has changed since the last call.
+    """
+    global _unknown_faces_cache
+
+    # os.scandir reports file type from the directory entry itself,
+    # so no extra stat per file.
+    image_filenames: List[str] = []
+    try:
+        with os.scandir(settings.unknown_faces_dir_str) as directory_entries:
+            for entry in directory_entries:
+                _, dot, extension = entry.name.rpartition(".")
+                if (
+                    dot
+                    and extension.lower() in ALLOWED_IMAGE_EXTENSIONS
+                    and entry.is_file(follow_symlinks=False)
+                ):
+                    image_filenames.append(entry.name)
+    except FileNotFoundError:
+        pass
+    image_filenames.sort()
+
+    # NUL can't appear in a filename, so the joined names are unambiguous
+    listing_digest = hashlib.blake2b(
+        "\0".join(image_filenames).encode(), digest_size=16
+    ).hexdigest()
+    if (
+        _unknown_faces_cache is not None
+        and _unknown_faces_cache[0] == listing_digest
+    ):
+        return _unknown_faces_cache
 
     face_entries: List[UnknownFaceEntry] = []
+    for filename in image_filenames:
+        # Extract timestamp from filename pattern:
+        #   unknown_YYYYMMDD_HHMMSS_<index>_<job token>.jpg
+        detected_at_string = _extract_timestamp_from_filename(filename)
 
-    # Sort by filename (which includes timestamp) for chronological order
-    sorted_files = sorted(unknown_faces_directory.iterdir())
-
-    for file_path in sorted_files:
-        if (
-            file_path.is_file()
-            and file_path.suffix.lower() in allowed_image_extensions
-        ):
-            # Extract timestamp from filename pattern:
-            #   unknown_YYYYMMDD_HHMMSS_<index>.jpg
-            detected_at_string = _extract_timestamp_from_filename(file_path.name)
-
-            face_entries.append(
-                UnknownFaceEntry(
-                    filename=file_path.name,
-                    image_url=f"/static/unknown_faces/{file_path.name}",
-                    detected_at=detected_at_string,
-                )
+        # Trusted values from our own directory listing: skip validation.
+        face_entries.append(
+            UnknownFaceEntry.model_construct(
+                filename=filename,
+                image_url=f"/static/unknown_faces/{filename}",
+                detected_at=detected_at_string,
             )
+        )
 
-    return UnknownFacesListResponse(
-        success=True,
-        total_count=len(face_entries),
-        faces=face_entries,
-    )
+    _unknown_faces_cache = (listing_digest, face_entries)
+    return _unknown_faces_cache
 
 
+@lru_cache(maxsize=8192)
 def _extract_timestamp_from_filename(filename: str) -> Optional[str]:
     """
     Attempt to parse a timestamp from filenames like
     ``unknown_20250610_143025_0.jpg``.
 
+    Uses plain string slicing instead of ``strptime`` (which re-interprets
+    the format string on every call); results are memoised per filename.
+
     Returns:
         An ISO-formatted datetime string, or ``None`` if parsing fails.
     """
+    # Remove extension, then split by underscore
+    stem = filename.rsplit(".", 1)[0]  # e.g. "unknown_20250610_143025_0"
+    parts = stem.split("_")
+    if len(parts) < 3:
+        return None
+
+    date_string = parts[1]  # "20250610"
+    time_string = parts[2]  # "143025"
+    if (
+        len(date_string) != 8
+        or len(time_string) != 6
+        or not date_string.isdigit()
+        or not time_string.isdigit()
+    ):
+        return None
+
     try:
-        # Remove extension, then split by underscore
-        stem = Path(filename).stem  # e.g. "unknown_20250610_143025_0"
-        parts = stem.split("_")
-        if len(parts) >= 3:
-            date_string = parts[1]  # "20250610"
-            time_string = parts[2]  # "143025"
-            parsed_datetime = datetime.strptime(
-                f"{date_string}{time_string}", "%Y%m%d%H%M%S"
-            )
-            return parsed_datetime.isoformat()
-    except (ValueError, IndexError):
-        pass
-    return None
+        parsed_datetime = datetime(
+            int(date_string[0:4]),
+            int(date_string[4:6]),
+            int(date_string[6:8]),
+            int(time_string[0:2]),
+            int(time_string[2:4]),
+            int(time_string[4:6]),
+        )
+    except ValueError:
+        return None
+    return parsed_datetime.isoformat()
+
+
+# ──────────────────────────────────────────────
+#  Conditional GET helpers (ETag / If-None-Match)
+# ──────────────────────────────────────────────
+
+
+def _make_etag(*version_parts: object) -> str:
+    """Build a quoted strong ETag from the values that version a listing."""
+    version_key = "|".join(str(part) for part in version_parts)
+    digest = hashlib.blake2s(version_key.encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Return ``True`` if the request's ``If-None-Match`` covers *etag*."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Weak comparison (RFC 9110 §13.1.2): ignore any W/ prefix,
+        # which proxies may add after compressing the body.
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def _set_validator_headers(response: Response, etag: str) -> None:
+    """Attach the ETag and ask clients to revalidate before reusing it."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _not_modified_response(etag: str) -> Response:
+    """Return an empty ``304`` that skips building the response body."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
 
 # ──────────────────────────────────────────────
@@ -363,6 +943,8 @@ def _extract_timestamp_from_filename(filename: str) -> Optional[str]:
     ),
 )
 async def get_daily_roster(
+    request: Request,
+    response: Response,
     target_date: Optional[str] = Query(
         default=None,
         alias="date",
@@ -381,20 +963,31 @@ async def get_daily_roster(
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ErrorResponse(
-                    error="Invalid date format",
-                    detail=(
+                detail={
+                    **_ERROR_INVALID_DATE_FORMAT,
+                    "detail": (
                         f"'{target_date}' is not valid. "
                         "Please use YYYY-MM-DD format."
                     ),
-                ).model_dump(),
+                },
             )
     else:
         roster_date = date.today()
 
-    records: List[AttendanceRecord] = fetch_daily_roster(
-        target_date=roster_date
-    )
+    # Any write to the CSV changes its mtime or size; the date is part
+    # of the tag because the default (today) changes with no write.
+    try:
+        csv_stat = os.stat(settings.attendance_csv_path_str)
+        csv_version: Tuple[int, int] = (csv_stat.st_mtime_ns, csv_stat.st_size)
+    except FileNotFoundError:
+        csv_version = (0, 0)
+
+    etag = _make_etag(roster_date.isoformat(), *csv_version)
+    if _etag_matches(request, etag):
+        return _not_modified_response(etag)
+    _set_validator_headers(response, etag)
+
+    records = _cached_daily_roster(roster_date, *csv_version)
 
     return DailyRosterResponse(
         date=roster_date,
@@ -403,6 +996,22 @@ async def get_daily_roster(
     )
 
 
+@lru_cache(maxsize=64)
+def _cached_daily_roster(
+    roster_date: date,
+    csv_mtime_ns: int,
+    csv_size: int,
+) -> Tuple[AttendanceRecord, ...]:
+    """
+    Parse the roster for *roster_date* once per CSV version.
+
+    The CSV's mtime and size are part of the key, so any write makes the
+    next request miss and re-read the file. Records are frozen models,
+    so sharing one cached tuple between requests is safe.
+    """
+    return tuple(fetch_daily_roster(target_date=roster_date))
+
+
 # ──────────────────────────────────────────────
 #  POST /manual-override
 # ──────────────────────────────────────────────
@@ -445,10 +1054,10 @@ async def manual_attendance_override(
     except Exception as write_error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=ErrorResponse(
-                error="Override failed",
-                detail=f"Could not write attendance record: {write_error}",
-            ).model_dump(),
+            detail={
+                **_ERROR_OVERRIDE_FAILED,
+                "detail": f"Could not write attendance record: {write_error}",
+            },
         )
 
     return ManualOverrideResponse(
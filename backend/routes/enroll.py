@@ -8,19 +8,26 @@ Key behaviours:
 - Accepts one or more image uploads alongside student metadata.
 - Extracts 128-d face encodings via ``face_recognition``.
 - Supports **multiple encodings per student** for improved accuracy.
-- Persists data to a local ``students_biometrics.json`` file.
+- Persists data via ``utils.biometrics_store`` (JSON metadata plus a
+  binary ``.npy`` encoding matrix).
 - Returns structured JSON responses on success and failure.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
+import cv2
 import face_recognition
 import numpy as np
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 
 from config import settings
 from models.schemas import (
@@ -29,89 +36,439 @@ from models.schemas import (
     ErrorResponse,
     StudentBiometricRecord,
 )
+from utils.biometrics_store import (
+    STORE_UPDATE_LOCK,
+    distinct_encoding_indices,
+    load_biometrics_store,
+    normalise_encodings,
+    save_biometrics_store,
+)
+
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG
+except ImportError:  # PyTurboJPEG not installed: decode everything with OpenCV
+    TurboJPEG = None
+
+logger = logging.getLogger("enroll")
+logger.setLevel(logging.INFO)
 
 router = APIRouter(prefix="/enroll", tags=["Enrollment"])
 
+# Static part of each error body raised below; a raise adds only its
+# "detail" (main.py's HTTPException handler renders the dict as-is)
+_ERROR_NO_IMAGES_PROVIDED = {"success": False, "error": "No images provided"}
+_ERROR_FILE_TOO_LARGE = {"success": False, "error": "File too large"}
+_ERROR_FACE_EXTRACTION_FAILED = {"success": False, "error": "Face extraction failed"}
+_ERROR_STORAGE_READ_ERROR = {"success": False, "error": "Storage read error"}
+_ERROR_STORAGE_WRITE_ERROR = {"success": False, "error": "Storage write error"}
+
+# face_recognition's (top, right, bottom, left) face box
+FaceLocation = Tuple[int, int, int, int]
+
+# Every JPEG file starts with these bytes (SOI marker + next marker)
+JPEG_MAGIC_BYTES = b"\xff\xd8\xff"
+
+# Longest side, in pixels, images are shrunk to before face detection.
+# Phone photos are often 4000 px+; HOG cost grows with pixel count while
+# the encoder only ever sees a 150 px face chip.
+MAX_IMAGE_SIDE = 1600
+
+# DCT scaling factors libjpeg-turbo can decode at, largest reduction first
+TURBOJPEG_SCALING_FACTORS = ((1, 8), (1, 4), (1, 2))
+
+# Read size when an upload's length isn't known up front
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _create_turbojpeg_decoder() -> Optional["TurboJPEG"]:
+    """Return a libjpeg-turbo decoder, or ``None`` if it isn't available."""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):
+        # Python wrapper installed but the libturbojpeg shared library isn't
+        return None
+
+
+_turbojpeg_decoder = _create_turbojpeg_decoder()
+
+# Created on first enrollment; see _get_encoding_pool()
+_encoding_pool: Optional[ProcessPoolExecutor] = None
+_encoding_pool_lock = threading.Lock()
+
 # ──────────────────────────────────────────────
 #  Helpers
 # ──────────────────────────────────────────────
 
 
-def _load_biometrics_store() -> Dict[str, StudentBiometricRecord]:
+def _decode_rgb_image(contents: bytes) -> Optional[np.ndarray]:
     """
-    Load the biometrics JSON file and return a dict keyed by student_id.
-    Creates an empty file / directory if they don't exist yet.
+    Decode image bytes into the RGB ``uint8`` array ``face_recognition``
+    expects, with the longest side at most ``MAX_IMAGE_SIDE``, or return
+    ``None`` if the bytes aren't a readable image.
+
+    JPEGs (most phone photos) go through libjpeg-turbo when available,
+    which decodes straight to RGB in one pass and can shrink by a power
+    of two while decoding. Everything else, or any JPEG it rejects, uses
+    ``cv2.imdecode`` + a BGR → RGB conversion.
     """
-    biometrics_path = settings.biometrics_path
-    biometrics_path.parent.mkdir(parents=True, exist_ok=True)
+    rgb_image: Optional[np.ndarray] = None
+
+    if _turbojpeg_decoder is not None and contents.startswith(JPEG_MAGIC_BYTES):
+        try:
+            rgb_image = _decode_jpeg_downscaled(contents)
+        except (OSError, ValueError):
+            pass  # let OpenCV have a go at it
+
+    if rgb_image is None:
+        image_array = np.frombuffer(contents, dtype=np.uint8)
+        decoded_image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+        if decoded_image is None:
+            return None
 
-    if not biometrics_path.exists() or biometrics_path.stat().st_size == 0:
-        biometrics_path.write_text("{}", encoding="utf-8")
-        return {}
+        # Convert BGR (OpenCV default) → RGB (face_recognition expects RGB)
+        rgb_image = cv2.cvtColor(decoded_image, cv2.COLOR_BGR2RGB)
 
-    raw_data: dict = json.loads(biometrics_path.read_text(encoding="utf-8"))
+    return _limit_image_side(rgb_image)
 
-    store: Dict[str, StudentBiometricRecord] = {}
-    for student_id, record_dict in raw_data.items():
-        store[student_id] = StudentBiometricRecord(**record_dict)
 
-    return store
+def _decode_jpeg_downscaled(contents: bytes) -> np.ndarray:
+    """
+    Decode a JPEG to RGB with libjpeg-turbo, using the largest DCT
+    scaling factor that keeps the longest side at or above
+    ``MAX_IMAGE_SIDE`` (skipping most of the IDCT work on huge photos).
+    """
+    width, height, _, _ = _turbojpeg_decoder.decode_header(contents)
+    longest_side = max(width, height)
+
+    for numerator, denominator in TURBOJPEG_SCALING_FACTORS:
+        if longest_side * numerator // denominator >= MAX_IMAGE_SIDE:
+            return _turbojpeg_decoder.decode(
+                contents,
+                pixel_format=TJPF_RGB,
+                scaling_factor=(numerator, denominator),
+            )
 
+    return _turbojpeg_decoder.decode(contents, pixel_format=TJPF_RGB)
 
-def _save_biometrics_store(store: Dict[str, StudentBiometricRecord]) -> None:
-    """Persist the full biometrics store to JSON."""
-    biometrics_path = settings.biometrics_path
 
-    serialisable: dict = {}
-    for student_id, record in store.items():
-        serialisable[student_id] = record.model_dump(mode="json")
+def _limit_image_side(rgb_image: np.ndarray) -> np.ndarray:
+    """Shrink *rgb_image* so its longest side is at most ``MAX_IMAGE_SIDE``."""
+    height, width = rgb_image.shape[:2]
+    scale = MAX_IMAGE_SIDE / max(height, width)
+    if scale >= 1.0:
+        return rgb_image
 
-    biometrics_path.write_text(
-        json.dumps(serialisable, indent=2, default=str),
-        encoding="utf-8",
+    return cv2.resize(
+        rgb_image,
+        (max(1, int(width * scale)), max(1, int(height * scale))),
+        interpolation=cv2.INTER_AREA,
     )
 
 
-async def _extract_face_encodings(image_file: UploadFile) -> List[np.ndarray]:
+def _locate_faces(rgb_images: List[np.ndarray]) -> List[List[FaceLocation]]:
+    """
+    Return the face locations in each image, detecting across all
+    images in as few dlib calls as possible.
+
+    The CNN detector runs once per group of same-sized images via
+    ``batch_face_locations`` (dlib batches only equal shapes; worthwhile
+    with a CUDA build, i.e. ``settings.use_gpu_batch``).
+    """
+    image_indices_by_shape: Dict[Tuple[int, ...], List[int]] = {}
+    for image_index, rgb_image in enumerate(rgb_images):
+        image_indices_by_shape.setdefault(rgb_image.shape, []).append(image_index)
+
+    face_locations: List[List[FaceLocation]] = [[] for _ in rgb_images]
+    for image_indices in image_indices_by_shape.values():
+        batch_locations = face_recognition.batch_face_locations(
+            [rgb_images[image_index] for image_index in image_indices],
+            number_of_times_to_upsample=1,
+            batch_size=len(image_indices),
+        )
+        for image_index, locations in zip(image_indices, batch_locations):
+            face_locations[image_index] = locations
+
+    return face_locations
+
+
+def _warm_dlib() -> None:
+    """
+    Encoding-pool worker initializer: run the HOG detector once on a
+    blank image so the first real request doesn't pay for paging the
+    dlib models in.
+    """
+    face_recognition.face_locations(np.zeros((64, 64, 3), dtype=np.uint8))
+
+
+def _decode_and_encode(contents: bytes) -> Optional[List[np.ndarray]]:
+    """
+    Encoding-pool worker: decode one image, detect its faces (HOG), and
+    return their encodings.
+
+    Encodings come back unit-length (see ``normalise_encodings``) as
+    ``float32``, the store's dtype, which also halves what is pickled
+    back from the worker. Returns ``None`` if the
+    bytes aren't a readable image, or an empty list if no face was
+    found; the caller turns both into errors.
+    """
+    rgb_image = _decode_rgb_image(contents)
+    if rgb_image is None:
+        return None
+
+    face_locations = face_recognition.face_locations(rgb_image)
+    if not face_locations:
+        return []
+
+    return list(
+        normalise_encodings(
+            face_recognition.face_encodings(
+                rgb_image, known_face_locations=face_locations
+            )
+        )
+    )
+
+
+def _get_encoding_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared worker pool for ``_decode_and_encode()``, creating
+    it on first use.
+
+    dlib's HOG detector and encoder hold the GIL for most of their run,
+    so images are spread over processes rather than threads. ``spawn``
+    is used so workers don't inherit the server's threads and locks.
+    """
+    global _encoding_pool
+    with _encoding_pool_lock:
+        if _encoding_pool is None:
+            _encoding_pool = ProcessPoolExecutor(
+                max_workers=settings.encode_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_dlib,
+            )
+        return _encoding_pool
+
+
+def shutdown_encoding_pool() -> None:
+    """Stop the encoding worker pool, cancelling work that hasn't started."""
+    global _encoding_pool
+    with _encoding_pool_lock:
+        if _encoding_pool is not None:
+            _encoding_pool.shutdown(wait=False, cancel_futures=True)
+            _encoding_pool = None
+
+
+def _decode_and_encode_batch(
+    image_contents: List[bytes],
+) -> List[Optional[List[np.ndarray]]]:
+    """
+    ``_decode_and_encode`` over a whole set of images in this process,
+    with face detection batched across them (see ``_locate_faces``).
+    Used on the GPU path, where one process should own the device.
+    """
+    rgb_images = [_decode_rgb_image(contents) for contents in image_contents]
+    decoded_images = [rgb_image for rgb_image in rgb_images if rgb_image is not None]
+    located_faces = iter(_locate_faces(decoded_images))
+
+    results: List[Optional[List[np.ndarray]]] = []
+    for rgb_image in rgb_images:
+        if rgb_image is None:
+            results.append(None)
+            continue
+
+        face_locations = next(located_faces)
+        results.append(
+            list(
+                normalise_encodings(
+                    face_recognition.face_encodings(
+                        rgb_image, known_face_locations=face_locations
+                    )
+                )
+            )
+            if face_locations
+            else []
+        )
+
+    return results
+
+
+async def _read_upload_within_limit(
+    image_file: UploadFile,
+    max_bytes: int,
+) -> Optional[bytes]:
     """
-    Read an uploaded image and return all face encodings found in it.
+    Return the full contents of *image_file*, or ``None`` if it is
+    larger than *max_bytes*.
+
+    Uses the size Starlette recorded while parsing the upload to reject
+    oversized files without reading them; if that is missing, the file
+    is read in ``UPLOAD_CHUNK_SIZE`` chunks and abandoned as soon as the
+    limit is passed. Either way each byte is read at most once.
+    """
+    if image_file.size is not None:
+        if image_file.size > max_bytes:
+            return None
+        return await image_file.read()
+
+    contents = bytearray()
+    while chunk := await image_file.read(UPLOAD_CHUNK_SIZE):
+        contents += chunk
+        if len(contents) > max_bytes:
+            return None
+
+    return bytes(contents)
+
+
+async def _extract_face_encodings(
+    image_contents: List[bytes],
+    filenames: List[str],
+) -> List[List[np.ndarray]]:
+    """
+    Return the face encodings found in each uploaded image.
+
+    On the default CPU path each image is decoded and encoded in its
+    own worker of the encoding pool, so a multi-image enrollment scales
+    across cores. With ``settings.use_gpu_batch`` the whole set is
+    handled in a threadpool thread instead, detecting faces in batches.
+    Either way the event loop is never blocked by dlib.
 
     Args:
-        image_file: The uploaded image file.
+        image_contents: The raw bytes of each uploaded image.
+        filenames:      Parallel list of upload filenames, for errors.
 
     Returns:
-        A list of 128-d numpy arrays (one per face detected).
+        One list of unit-length 128-d ``float32`` arrays per image (one
+        per face detected).
 
     Raises:
-        ValueError: If the image cannot be read or no faces are found.
+        ValueError: If an image cannot be read or has no faces.
     """
-    contents = await image_file.read()
+    if settings.use_gpu_batch:
+        results = await run_in_threadpool(_decode_and_encode_batch, image_contents)
+    else:
+        loop = asyncio.get_running_loop()
+        encoding_pool = _get_encoding_pool()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(encoding_pool, _decode_and_encode, contents)
+                for contents in image_contents
+            )
+        )
 
-    # Decode image bytes into a numpy array via OpenCV-compatible route
-    image_array = np.frombuffer(contents, dtype=np.uint8)
+    encodings_per_image: List[List[np.ndarray]] = []
+    for filename, face_encodings in zip(filenames, results):
+        if face_encodings is None:
+            raise ValueError(
+                f"Could not decode image file '{filename}'. "
+                "Ensure it is a valid JPEG or PNG."
+            )
+        if not face_encodings:
+            raise ValueError(
+                f"No faces detected in '{filename}'. "
+                "Please upload a clear, well-lit photo."
+            )
+        encodings_per_image.append(face_encodings)
 
-    # face_recognition expects an RGB numpy image
-    import cv2
-    decoded_image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+    return encodings_per_image
 
-    if decoded_image is None:
-        raise ValueError(
-            f"Could not decode image file '{image_file.filename}'. "
-            "Ensure it is a valid JPEG or PNG."
-        )
 
-    # Convert BGR (OpenCV default) → RGB (face_recognition expects RGB)
-    rgb_image = cv2.cvtColor(decoded_image, cv2.COLOR_BGR2RGB)
+def _add_encodings_to_store(
+    student_id: str,
+    student_name: str,
+    division: Optional[str],
+    graduation_year: Optional[int],
+    extracted_encodings: List[np.ndarray],
+) -> Tuple[int, int, int]:
+    """
+    Add *extracted_encodings* to the student's record (creating it if
+    needed) and persist the store. Blocking: run in the threadpool.
 
-    face_encodings = face_recognition.face_encodings(rgb_image)
+    Holds ``STORE_UPDATE_LOCK`` from load to save, so neither another
+    enrollment nor an alumni cleanup can interleave and overwrite it.
 
-    if not face_encodings:
-        raise ValueError(
-            f"No faces detected in '{image_file.filename}'. "
-            "Please upload a clear, well-lit photo."
-        )
+    Returns:
+        ``(added, near_duplicates_skipped, total_encodings_stored)``
+    """
+    with STORE_UPDATE_LOCK:
+        try:
+            biometrics_store = load_biometrics_store()
+        except Exception as load_error:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={
+                    **_ERROR_STORAGE_READ_ERROR,
+                    "detail": f"Failed to load biometric store: {load_error}",
+                },
+            )
 
-    return face_encodings
+        # ── Skip encodings the student effectively already has ───
+        # (the same check save_biometrics_store applies; run here so
+        # the response can report what was skipped)
+        existing_record = biometrics_store.get(student_id)
+        existing_encodings = [
+            encoding_record.encoding
+            for encoding_record in (
+                existing_record.encodings if existing_record is not None else []
+            )
+        ]
+        kept_encodings = [
+            extracted_encodings[row_index - len(existing_encodings)]
+            for row_index in distinct_encoding_indices(
+                normalise_encodings(existing_encodings + extracted_encodings)
+            )
+            if row_index >= len(existing_encodings)
+        ]
+        near_duplicate_count = len(extracted_encodings) - len(kept_encodings)
+        if near_duplicate_count:
+            logger.info(
+                "Skipped %d near-duplicate encoding(s) for %s",
+                near_duplicate_count,
+                student_id,
+            )
+
+        registration_timestamp = datetime.now(tz=timezone.utc)
+        new_encoding_records = [
+            EncodingRecord(
+                encoding=encoding_array.tolist(),
+                registered_at=registration_timestamp,
+            )
+            for encoding_array in kept_encodings
+        ]
+
+        if existing_record is not None:
+            # Append new encodings to the existing record
+            existing_record.student_name = student_name  # Allow name updates
+            existing_record.division = division
+            if graduation_year is not None:
+                existing_record.graduation_year = graduation_year
+            existing_record.encodings.extend(new_encoding_records)
+        else:
+            # Create a brand-new record
+            biometrics_store[student_id] = StudentBiometricRecord(
+                student_id=student_id,
+                student_name=student_name,
+                division=division,
+                graduation_year=graduation_year,
+                encodings=new_encoding_records,
+            )
+
+        try:
+            save_biometrics_store(biometrics_store)
+        except Exception as save_error:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={
+                    **_ERROR_STORAGE_WRITE_ERROR,
+                    "detail": f"Failed to save biometric store: {save_error}",
+                },
+            )
+
+        return (
+            len(new_encoding_records),
+            near_duplicate_count,
+            len(biometrics_store[student_id].encodings),
+        )
 
 
 # ──────────────────────────────────────────────
@@ -131,7 +488,7 @@ async def _extract_face_encodings(image_file: UploadFile) -> List[np.ndarray]:
     description=(
         "Accepts one or more face images plus student metadata. "
         "Extracts 128-d face encodings and stores them in the "
-        "biometrics JSON file, supporting multiple encodings per student."
+        "biometrics store, supporting multiple encodings per student."
     ),
 )
 async def enroll_student(
@@ -172,112 +529,84 @@ async def enroll_student(
 
     Workflow:
     1. Validate that at least one image is provided.
-    2. For each image, extract all detected face encodings.
+    2. Decode every image and extract all detected face encodings,
+       one image per encoding-pool worker.
     3. Load the existing biometric store.
-    4. Append the new encodings to the student's record.
+    4. Append the new encodings to the student's record, skipping
+       near-duplicates of ones already stored.
     5. Persist the updated store and return a success response.
     """
     # ── Validate upload count ────────────────────────────────────
     if not images:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ErrorResponse(
-                error="No images provided",
-                detail="At least one face image is required for enrollment.",
-            ).model_dump(),
+            detail={
+                **_ERROR_NO_IMAGES_PROVIDED,
+                "detail": "At least one face image is required for enrollment.",
+            },
         )
 
-    # ── Validate file sizes ──────────────────────────────────────
+    # ── Read each upload once, validating its size ───────────────
     max_bytes = settings.max_upload_size_mb * 1024 * 1024
+    image_contents: List[bytes] = []
     for image_file in images:
-        # Read size by seeking (we'll reset for later reading)
-        content_peek = await image_file.read()
-        if len(content_peek) > max_bytes:
+        contents = await _read_upload_within_limit(image_file, max_bytes)
+        if contents is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ErrorResponse(
-                    error="File too large",
-                    detail=(
+                detail={
+                    **_ERROR_FILE_TOO_LARGE,
+                    "detail": (
                         f"'{image_file.filename}' exceeds the "
                         f"{settings.max_upload_size_mb} MB limit."
                     ),
-                ).model_dump(),
+                },
             )
-        # Reset the file pointer so _extract_face_encodings can read it
-        await image_file.seek(0)
+        image_contents.append(contents)
 
     # ── Extract encodings from every uploaded image ──────────────
-    new_encoding_records: List[EncodingRecord] = []
-    registration_timestamp = datetime.now(tz=timezone.utc)
-
-    for image_file in images:
-        try:
-            face_encodings = await _extract_face_encodings(image_file)
-        except ValueError as extraction_error:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ErrorResponse(
-                    error="Face extraction failed",
-                    detail=str(extraction_error),
-                ).model_dump(),
-            )
-
-        for encoding_array in face_encodings:
-            new_encoding_records.append(
-                EncodingRecord(
-                    encoding=encoding_array.tolist(),
-                    registered_at=registration_timestamp,
-                )
-            )
-
-    # ── Persist to biometrics store ──────────────────────────────
     try:
-        biometrics_store = _load_biometrics_store()
-    except Exception as load_error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=ErrorResponse(
-                error="Storage read error",
-                detail=f"Failed to load biometric store: {load_error}",
-            ).model_dump(),
+        encodings_per_image = await _extract_face_encodings(
+            image_contents,
+            [image_file.filename for image_file in images],
         )
-
-    if student_id in biometrics_store:
-        # Append new encodings to the existing record
-        existing_record = biometrics_store[student_id]
-        existing_record.student_name = student_name  # Allow name updates
-        existing_record.division = division
-        if graduation_year is not None:
-            existing_record.graduation_year = graduation_year
-        existing_record.encodings.extend(new_encoding_records)
-    else:
-        # Create a brand-new record
-        biometrics_store[student_id] = StudentBiometricRecord(
-            student_id=student_id,
-            student_name=student_name,
-            division=division,
-            graduation_year=graduation_year,
-            encodings=new_encoding_records,
-        )
-
-    try:
-        _save_biometrics_store(biometrics_store)
-    except Exception as save_error:
+    except ValueError as extraction_error:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=ErrorResponse(
-                error="Storage write error",
-                detail=f"Failed to save biometric store: {save_error}",
-            ).model_dump(),
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                **_ERROR_FACE_EXTRACTION_FAILED,
+                "detail": str(extraction_error),
+            },
         )
 
-    total_encodings = len(biometrics_store[student_id].encodings)
+    extracted_encodings = [
+        encoding_array
+        for face_encodings in encodings_per_image
+        for encoding_array in face_encodings
+    ]
+
+    # ── Persist to biometrics store ──────────────────────────────
+    # Load → modify → save runs in the threadpool under the store's
+    # update lock (see _add_encodings_to_store)
+    added_count, near_duplicate_count, total_encodings = await run_in_threadpool(
+        _add_encodings_to_store,
+        student_id,
+        student_name,
+        division,
+        graduation_year,
+        extracted_encodings,
+    )
 
     return EnrollmentResponse(
         success=True,
         message=(
-            f"Successfully enrolled {len(new_encoding_records)} new encoding(s) "
+            f"Successfully enrolled {added_count} new encoding(s) "
             f"for student '{student_name}' ({student_id})."
+            + (
+                f" Skipped {near_duplicate_count} near-duplicate(s)."
+                if near_duplicate_count
+                else ""
+            )
         ),
         student_id=student_id,
         encodings_stored=total_encodings,
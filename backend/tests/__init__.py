@@ -0,0 +1,17 @@
+"""
+Backend unit tests. Run from ``backend/``:
+    python -m unittest discover -s tests -t .
+
+Test modules import this package first, so ``DATA_DIR`` points at a
+throw-away directory before ``config.settings`` is created and no test
+touches the real ``data/`` directory.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="lookin-tests-")
+os.environ["DATA_DIR"] = _TEST_DATA_DIR
+atexit.register(shutil.rmtree, _TEST_DATA_DIR, ignore_errors=True)
@@ -0,0 +1,185 @@
+"""
+Biometrics store tests
+======================
+Concurrent updates of the store (enrollment and alumni removal) and
+reads that land between the two files of a save.
+
+Run from ``backend/``:
+    python -m unittest discover -s tests -t .
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+from typing import List
+from unittest import mock
+
+import numpy as np
+
+from config import settings
+from models.schemas import EncodingRecord, StudentBiometricRecord
+from routes.enroll import _add_encodings_to_store
+from utils import biometrics_store
+from utils.biometrics_store import (
+    ENCODING_DIMENSIONS,
+    load_biometrics_store,
+    remove_students,
+    save_biometrics_store,
+)
+
+
+def _random_encodings(count: int, seed: int) -> List[np.ndarray]:
+    """Return *count* random (so never near-duplicate) encodings."""
+    rng = np.random.default_rng(seed)
+    return list(rng.standard_normal((count, ENCODING_DIMENSIONS)))
+
+
+def _clear_store() -> None:
+    """Delete both store files and forget this process's caches."""
+    for store_path in (
+        settings.biometrics_path_str,
+        settings.biometrics_matrix_path_str,
+    ):
+        if os.path.exists(store_path):
+            os.remove(store_path)
+    biometrics_store._store_cache = None
+    biometrics_store._encoding_matrix_cache = None
+
+
+class ConcurrentStoreUpdateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        _clear_store()
+        self.addCleanup(_clear_store)
+
+    def test_enrollments_and_alumni_cleanup_do_not_overwrite_each_other(self) -> None:
+        for alumni_index in range(8):
+            _add_encodings_to_store(
+                f"alum{alumni_index}", "Alumnus", None, 2020,
+                _random_encodings(2, seed=alumni_index),
+            )
+
+        new_student_ids = [f"new{index}" for index in range(8)]
+        start_together = threading.Barrier(len(new_student_ids) + 1)
+        removed_records: List[dict] = []
+
+        def enroll(student_index: int) -> None:
+            start_together.wait()
+            _add_encodings_to_store(
+                new_student_ids[student_index], "Student", "A", 2030,
+                _random_encodings(2, seed=100 + student_index),
+            )
+
+        def clean_up_alumni() -> None:
+            start_together.wait()
+            removed, _ = remove_students(
+                lambda record_dict: (record_dict.get("graduation_year") or 9999)
+                <= 2024
+            )
+            removed_records.extend(removed)
+
+        workers = [
+            threading.Thread(target=enroll, args=(student_index,))
+            for student_index in range(len(new_student_ids))
+        ]
+        workers.append(threading.Thread(target=clean_up_alumni))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(removed_records), 8)
+        store = load_biometrics_store()
+        self.assertEqual(sorted(store), sorted(new_student_ids))
+        for student_id in new_student_ids:
+            self.assertEqual(len(store[student_id].encodings), 2)
+
+
+
+def _save_single_encoding(value: float) -> None:
+    """Save a one-student store whose only encoding is *value* everywhere."""
+    save_biometrics_store({
+        "s1": StudentBiometricRecord(
+            student_id="s1",
+            student_name="Student",
+            encodings=[
+                EncodingRecord(
+                    encoding=[value] * ENCODING_DIMENSIONS,
+                    registered_at=datetime.now(timezone.utc),
+                )
+            ],
+        )
+    })
+
+
+class TornReadTest(unittest.TestCase):
+    """
+    A save renames the matrix file into place, then the JSON. A reader
+    in between sees the new matrix with the old JSON: same row count,
+    different values, so only the matrix digest tells them apart.
+    """
+
+    def setUp(self) -> None:
+        _clear_store()
+        self.addCleanup(_clear_store)
+
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        self.old_json_path = os.path.join(temp_directory.name, "old.json")
+        self.new_json_path = os.path.join(temp_directory.name, "new.json")
+
+        _save_single_encoding(1.0)
+        shutil.copy(settings.biometrics_path_str, self.old_json_path)
+        _save_single_encoding(-1.0)
+        shutil.copy(settings.biometrics_path_str, self.new_json_path)
+
+        # Leave the store torn: old JSON next to the new matrix
+        shutil.copy(self.old_json_path, settings.biometrics_path_str)
+        biometrics_store._store_cache = None
+
+        retry_patch = mock.patch.object(
+            biometrics_store, "STORE_READ_RETRY_SECONDS", 0
+        )
+        retry_patch.start()
+        self.addCleanup(retry_patch.stop)
+
+    def test_mismatch_is_raised_once_retries_run_out(self) -> None:
+        read_uncached = biometrics_store._read_store_files_uncached
+        with mock.patch.object(
+            biometrics_store,
+            "_read_store_files_uncached",
+            side_effect=read_uncached,
+        ) as read_spy:
+            with self.assertRaises(ValueError):
+                load_biometrics_store()
+
+        self.assertEqual(
+            read_spy.call_count, biometrics_store.STORE_READ_ATTEMPTS
+        )
+
+    def test_read_is_retried_until_the_save_completes(self) -> None:
+        read_uncached = biometrics_store._read_store_files_uncached
+
+        def read_then_finish_save():
+            try:
+                return read_uncached()
+            finally:
+                # The writer's second rename lands after the first attempt
+                shutil.copy(self.new_json_path, settings.biometrics_path_str)
+
+        with mock.patch.object(
+            biometrics_store,
+            "_read_store_files_uncached",
+            side_effect=read_then_finish_save,
+        ) as read_spy:
+            store = load_biometrics_store()
+
+        self.assertEqual(read_spy.call_count, 2)
+        # Stored unit-normalised: the new save's values are all negative
+        self.assertLess(store["s1"].encodings[0].encoding[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Attendance CSV tests
+====================
+Checks that rows keep their exact text through the manual-override
+rewrite, which re-reads the whole CSV with pandas and writes it back,
+and that the in-memory index follows changes made to the file by
+other processes (appends, rewrites, truncation).
+
+Run from ``backend/``:
+    python -m unittest discover -s tests -t .
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+from typing import List
+from unittest import mock
+
+from utils import csv_handler
+
+ATTENDANCE_DATE = date(2025, 6, 10)
+
+
+class _AttendanceCsvTestCase(unittest.TestCase):
+    """Points the CSV at a fresh temporary file for every test."""
+
+    def setUp(self) -> None:
+        temp_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_directory.cleanup)
+        self.csv_path = os.path.join(temp_directory.name, "attendance_logs.csv")
+
+        csv_path_patch = mock.patch.object(
+            csv_handler, "_csv_path", return_value=self.csv_path
+        )
+        csv_path_patch.start()
+        self.addCleanup(csv_path_patch.stop)
+
+        # Start from an empty in-memory index and no open append handle
+        csv_handler.close_attendance_log()
+        csv_handler._index_version = None
+        self.addCleanup(csv_handler.close_attendance_log)
+
+    def _data_lines(self) -> List[str]:
+        """Return the CSV's lines after the header."""
+        with open(self.csv_path, encoding="utf-8") as csv_file:
+            return csv_file.read().splitlines()[1:]
+
+
+class OverrideRewriteRoundTripTest(_AttendanceCsvTestCase):
+    def test_zero_padded_id_and_empty_division_survive_rewrite(self) -> None:
+        csv_handler.mark_student_present("0012", "Asha", None, ATTENDANCE_DATE)
+        csv_handler.mark_student_present("0042", "Ravi", "NA", ATTENDANCE_DATE)
+
+        # Existing row → full rewrite of the file
+        csv_handler.manual_override_attendance(
+            "0012", "Asha", None, ATTENDANCE_DATE, status="absent"
+        )
+
+        with open(self.csv_path, encoding="utf-8") as csv_file:
+            data_lines = csv_file.read().splitlines()[1:]
+        self.assertEqual(len(data_lines), 2)
+        self.assertTrue(data_lines[0].startswith("0012,Asha,,2025-06-10,"))
+        self.assertTrue(data_lines[0].endswith(",absent"))
+        self.assertTrue(data_lines[1].startswith("0042,Ravi,NA,2025-06-10,"))
+
+        roster = csv_handler.fetch_daily_roster(ATTENDANCE_DATE)
+        self.assertEqual(
+            [(record.student_id, record.division) for record in roster],
+            [("0012", None), ("0042", "NA")],
+        )
+
+        # The rewritten row is still found, so no duplicate is appended
+        csv_handler.mark_student_present("0042", "Ravi", "NA", ATTENDANCE_DATE)
+        with open(self.csv_path, encoding="utf-8") as csv_file:
+            self.assertEqual(len(csv_file.read().splitlines()), 3)
+
+
+
+class IndexRefreshTest(_AttendanceCsvTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        csv_handler.mark_student_present("0012", "Asha", "A", ATTENDANCE_DATE)
+
+        # Record which rows each index update parses
+        self.indexed_rows = []
+        index_rows = csv_handler._index_rows
+
+        def record_indexed_rows(rows) -> None:
+            rows = list(rows)
+            self.indexed_rows.append([row["student_id"] for row in rows])
+            index_rows(rows)
+
+        index_patch = mock.patch.object(
+            csv_handler, "_index_rows", side_effect=record_indexed_rows
+        )
+        index_patch.start()
+        self.addCleanup(index_patch.stop)
+
+    def test_external_append_is_read_from_the_tail_only(self) -> None:
+        # A video worker in another process appends its own row
+        with open(self.csv_path, "a", encoding="utf-8") as csv_file:
+            csv_file.write("0042,Ravi,B,2025-06-10,08:00:00,present\n")
+
+        record = csv_handler.mark_student_present(
+            "0042", "Ravi", "B", ATTENDANCE_DATE
+        )
+
+        self.assertEqual(record.time, "08:00:00")
+        self.assertEqual(self.indexed_rows, [["0042"]])
+        self.assertEqual(len(self._data_lines()), 2)
+
+    def test_replaced_file_is_reindexed_in_full(self) -> None:
+        # Another process rewrites the CSV and renames it into place
+        replacement_path = self.csv_path + ".tmp"
+        with open(replacement_path, "w", encoding="utf-8") as csv_file:
+            csv_file.write(",".join(csv_handler.ATTENDANCE_COLUMNS) + "\n")
+            csv_file.write("0042,Ravi,B,2025-06-10,08:00:00,present\n")
+            csv_file.write("0077,Meera,B,2025-06-10,08:05:00,absent\n")
+        os.replace(replacement_path, self.csv_path)
+
+        record = csv_handler.mark_student_present(
+            "0042", "Ravi", "B", ATTENDANCE_DATE
+        )
+        self.assertEqual(record.time, "08:00:00")
+        self.assertEqual(self.indexed_rows, [["0042", "0077"]])
+
+        # Asha's row went with the old file, so she is marked again
+        csv_handler.mark_student_present("0012", "Asha", "A", ATTENDANCE_DATE)
+        self.assertEqual(len(self._data_lines()), 3)
+        self.assertTrue(self._data_lines()[2].startswith("0012,Asha,A,"))
+
+    def test_truncated_file_is_reindexed_in_full(self) -> None:
+        with open(self.csv_path, "r+", encoding="utf-8") as csv_file:
+            header_line = csv_file.readline()
+            csv_file.truncate(len(header_line.encode("utf-8")))
+
+        csv_handler.mark_student_present("0012", "Asha", "A", ATTENDANCE_DATE)
+
+        self.assertEqual(self.indexed_rows, [[]])
+        self.assertEqual(len(self._data_lines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Job store tests
+===============
+The in-memory job store against its on-disk form: WAL replay (including
+a torn final line), compaction into the snapshot, the content-hash
+lookup, and failing jobs a previous run left "processing".
+
+Run from ``backend/``:
+    python -m unittest discover -s tests -t .
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from config import settings
+from utils import job_store
+from utils.job_store import (
+    INTERRUPTED_JOB_ERROR,
+    compact_jobs,
+    fail_interrupted_jobs,
+    find_job_by_content_hash,
+    get_job,
+    save_job,
+)
+
+
+def _clear_jobs() -> None:
+    """Delete the snapshot and WAL and empty the in-memory store."""
+    for jobs_file_path in (settings.jobs_path_str, job_store._wal_path()):
+        if os.path.exists(jobs_file_path):
+            os.remove(jobs_file_path)
+    job_store._JOBS.clear()
+    job_store._JOB_IDS_BY_CONTENT_HASH.clear()
+    job_store._updates_since_compaction = 0
+
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        _clear_jobs()
+        self.addCleanup(_clear_jobs)
+
+    def test_wal_replay_restores_latest_state_and_skips_torn_line(self) -> None:
+        save_job("job1", {"status": "processing", "content_hash": "aaa"})
+        save_job("job2", {"status": "processing"})
+        save_job("job1", {"status": "completed", "content_hash": "aaa"})
+        # A crash mid-append leaves half a line at the end of the WAL
+        with open(job_store._wal_path(), "ab") as wal_file:
+            wal_file.write(b'{"job3": {"sta')
+
+        self.assertFalse(os.path.exists(settings.jobs_path_str))
+        self.assertEqual(
+            job_store._read_jobs_from_disk(),
+            {
+                "job1": {"status": "completed", "content_hash": "aaa"},
+                "job2": {"status": "processing"},
+            },
+        )
+
+    def test_compaction_folds_wal_into_snapshot(self) -> None:
+        save_job("job1", {"status": "completed"})
+        save_job("job2", {"status": "failed", "error": "boom"})
+
+        compact_jobs()
+        self.assertFalse(os.path.exists(job_store._wal_path()))
+
+        save_job("job2", {"status": "completed"})
+        with open(job_store._wal_path(), "rb") as wal_file:
+            self.assertEqual(len(wal_file.readlines()), 1)
+
+        self.assertEqual(
+            job_store._read_jobs_from_disk(),
+            {"job1": {"status": "completed"}, "job2": {"status": "completed"}},
+        )
+
+    def test_compacts_every_n_updates(self) -> None:
+        with mock.patch.object(job_store, "COMPACT_EVERY_N_UPDATES", 3):
+            save_job("job1", {"status": "processing"})
+            save_job("job2", {"status": "processing"})
+            self.assertTrue(os.path.exists(job_store._wal_path()))
+
+            save_job("job1", {"status": "completed"})
+            self.assertFalse(os.path.exists(job_store._wal_path()))
+
+        self.assertEqual(
+            job_store._read_jobs_from_disk(),
+            {"job1": {"status": "completed"}, "job2": {"status": "processing"}},
+        )
+
+    def test_content_hash_resolves_to_latest_job(self) -> None:
+        save_job("job1", {"status": "failed", "content_hash": "aaa"})
+        save_job("job2", {"status": "completed", "content_hash": "aaa"})
+        save_job("job3", {"status": "completed", "content_hash": "bbb"})
+
+        self.assertEqual(find_job_by_content_hash("aaa"), "job2")
+        self.assertEqual(find_job_by_content_hash("bbb"), "job3")
+        self.assertIsNone(find_job_by_content_hash("ccc"))
+
+    def test_fail_interrupted_jobs_only_touches_processing_jobs(self) -> None:
+        save_job("job1", {
+            "status": "processing",
+            "video_filename": "class.mp4",
+            "content_hash": "aaa",
+        })
+        save_job("job2", {"status": "completed", "content_hash": "bbb"})
+
+        self.assertEqual(fail_interrupted_jobs(), ["job1"])
+
+        interrupted_job = get_job("job1")
+        self.assertEqual(interrupted_job["status"], "failed")
+        self.assertEqual(interrupted_job["error"], INTERRUPTED_JOB_ERROR)
+        self.assertEqual(interrupted_job["video_filename"], "class.mp4")
+        # The hash is kept, so a re-upload finds (and retries) this job
+        self.assertEqual(find_job_by_content_hash("aaa"), "job1")
+        self.assertEqual(get_job("job2"), {"status": "completed", "content_hash": "bbb"})
+        self.assertEqual(job_store._read_jobs_from_disk()["job1"], interrupted_job)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Video upload de-duplication tests
+=================================
+Uploads of the same bytes must resolve to one processing job: while it
+runs, after it completes, and also when uploads arrive together. A
+failed job is retried instead of being reused.
+
+``process_video`` is replaced by a stub, and jobs run on a thread pool
+instead of worker processes.
+
+Run from ``backend/``:
+    python -m unittest discover -s tests -t .
+"""
+
+import asyncio
+import os
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import httpx
+
+from main import app
+from models.schemas import VideoProcessingResult
+from routes import attendance
+from utils import job_store
+
+UPLOAD_URL = "/api/attendance/upload-video"
+
+
+def _video_files(video_bytes: bytes) -> dict:
+    """Multipart ``files`` for an MP4 upload of *video_bytes*."""
+    return {"video": ("class.mp4", video_bytes, "video/mp4")}
+
+
+class UploadDeduplicationTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        job_store._JOBS.clear()
+        job_store._JOB_IDS_BY_CONTENT_HASH.clear()
+
+        # Jobs block until the test lets them finish
+        self.finish_jobs = threading.Event()
+        self.fail_jobs = False
+        self.processed_paths = []
+
+        def fake_process_video(video_path: str) -> VideoProcessingResult:
+            self.processed_paths.append(video_path)
+            self.finish_jobs.wait(timeout=10)
+            if self.fail_jobs:
+                raise RuntimeError("decoder crashed")
+            return VideoProcessingResult(
+                video_filename=os.path.basename(video_path)
+            )
+
+        self.processing_pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.processing_pool.shutdown)
+        self.addCleanup(self.finish_jobs.set)
+        for patch in (
+            mock.patch.object(attendance, "process_video", fake_process_video),
+            mock.patch.object(
+                attendance,
+                "_get_processing_pool",
+                return_value=self.processing_pool,
+            ),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def asyncSetUp(self) -> None:
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.client.aclose()
+
+    def _finish_running_jobs(self) -> None:
+        """Let every job finish and wait for its outcome to be recorded."""
+        self.finish_jobs.set()
+        self.processing_pool.shutdown(wait=True)
+
+    async def test_concurrent_identical_uploads_share_one_job(self) -> None:
+        video_bytes = os.urandom(64 * 1024)
+
+        responses = await asyncio.gather(*[
+            self.client.post(UPLOAD_URL, files=_video_files(video_bytes))
+            for _ in range(3)
+        ])
+
+        self.assertEqual([response.status_code for response in responses], [202] * 3)
+        job_ids = {response.json()["job_id"] for response in responses}
+        self.assertEqual(len(job_ids), 1)
+
+        self._finish_running_jobs()
+        job_id = job_ids.pop()
+        self.assertEqual(job_store.get_job(job_id)["status"], "completed")
+        self.assertEqual(len(self.processed_paths), 1)
+        self.assertEqual(attendance._in_flight_job_count, 0)
+
+        # A later re-upload is answered with the completed job
+        response = await self.client.post(UPLOAD_URL, files=_video_files(video_bytes))
+        self.assertEqual(response.json()["job_id"], job_id)
+        self.assertEqual(attendance._in_flight_job_count, 0)
+
+    async def test_different_videos_get_separate_jobs(self) -> None:
+        first = await self.client.post(UPLOAD_URL, files=_video_files(b"a" * 4096))
+        second = await self.client.post(UPLOAD_URL, files=_video_files(b"b" * 4096))
+
+        self.assertNotEqual(first.json()["job_id"], second.json()["job_id"])
+        self._finish_running_jobs()
+
+    async def test_failed_job_is_retried_not_reused(self) -> None:
+        video_bytes = os.urandom(16 * 1024)
+        self.fail_jobs = True
+
+        first = await self.client.post(UPLOAD_URL, files=_video_files(video_bytes))
+        self._finish_running_jobs()
+        failed_job_id = first.json()["job_id"]
+        self.assertEqual(job_store.get_job(failed_job_id)["status"], "failed")
+
+        self.processing_pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.processing_pool.shutdown)
+        attendance._get_processing_pool.return_value = self.processing_pool
+        self.fail_jobs = False
+
+        retry = await self.client.post(UPLOAD_URL, files=_video_files(video_bytes))
+        self.assertNotEqual(retry.json()["job_id"], failed_job_id)
+        self._finish_running_jobs()
+        self.assertEqual(job_store.get_job(retry.json()["job_id"])["status"], "completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Face matching tests
+===================
+Checks ``_best_matches()`` — one matrix product over unit-normalised
+encodings — against a brute-force Euclidean distance to every known
+encoding.
+
+Run from ``backend/``:
+    python -m unittest discover -s tests -t .
+"""
+
+import unittest
+from typing import Tuple
+
+import numpy as np
+
+from utils.biometrics_store import ENCODING_DIMENSIONS, normalise_encodings
+from utils.vision_engine import _best_matches
+
+
+def _brute_force_matches(
+    known_face_encodings: np.ndarray,
+    face_encodings: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Closest known row and its distance, in float64, one pair at a time."""
+    known_unit = known_face_encodings / np.linalg.norm(
+        known_face_encodings, axis=1, keepdims=True
+    )
+    faces_unit = face_encodings / np.linalg.norm(
+        face_encodings, axis=1, keepdims=True
+    )
+    distances = np.linalg.norm(
+        faces_unit[:, np.newaxis, :] - known_unit[np.newaxis, :, :], axis=2
+    )
+    return np.argmin(distances, axis=1), np.min(distances, axis=1)
+
+
+class BestMatchesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(7)
+        self.known_raw = rng.standard_normal((60, ENCODING_DIMENSIONS))
+        self.known_face_encodings = normalise_encodings(self.known_raw)
+        # Faces near known rows, plus unrelated ones
+        near_known = self.known_raw[[3, 17, 42]] + 0.05 * rng.standard_normal(
+            (3, ENCODING_DIMENSIONS)
+        )
+        unrelated = rng.standard_normal((5, ENCODING_DIMENSIONS))
+        self.face_raw = np.vstack([near_known, unrelated])
+
+    def test_matches_brute_force_reference(self) -> None:
+        # More rows than faces: only the first F rows may be used
+        similarity_buffer = np.empty(
+            (len(self.face_raw) + 4, len(self.known_face_encodings)),
+            dtype=np.float32,
+        )
+
+        best_indices, best_distances = _best_matches(
+            self.known_face_encodings, list(self.face_raw), similarity_buffer
+        )
+        expected_indices, expected_distances = _brute_force_matches(
+            self.known_raw, self.face_raw
+        )
+
+        np.testing.assert_array_equal(best_indices, expected_indices)
+        np.testing.assert_allclose(best_distances, expected_distances, atol=1e-4)
+        np.testing.assert_array_equal(best_indices[:3], [3, 17, 42])
+
+    def test_exact_match_has_zero_distance(self) -> None:
+        similarity_buffer = np.empty(
+            (1, len(self.known_face_encodings)), dtype=np.float32
+        )
+
+        best_indices, best_distances = _best_matches(
+            self.known_face_encodings, [self.known_raw[25]], similarity_buffer
+        )
+
+        self.assertEqual(best_indices[0], 25)
+        # Rounding may push 2 - 2 * similarity just below zero
+        self.assertFalse(np.isnan(best_distances[0]))
+        self.assertAlmostEqual(float(best_distances[0]), 0.0, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
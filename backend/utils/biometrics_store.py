@@ -0,0 +1,549 @@
+"""
+Biometrics Store
+================
+Reads and writes the student biometrics store shared by enrollment,
+alumni cleanup, and the vision engine.
+
+The store is split across two files:
+
+- ``students_biometrics.json`` — per-student metadata, one
+  ``registered_at`` entry per encoding, ``encoding_offset``: the
+  matrix row holding the student's first encoding, and
+  ``matrix_digest``: a hash of the matrix saved alongside it.
+- ``students_biometrics.npy`` — every encoding stacked into a single
+  contiguous ``float32`` matrix of shape (N, 128).
+
+Stores written before the split (encodings embedded as JSON float lists)
+are still read; the next save converts them.
+
+Encodings are stored L2-normalised (unit length; see
+``normalise_encodings``), so matching is a dot product. Each save also
+drops a student's near-duplicate encodings (see
+``distinct_encoding_indices``).
+
+The two files are replaced one after the other, so a reader in another
+process can land between the renames; the digest (and row count) catch
+a matrix that doesn't belong to the metadata, and the read is retried.
+
+Every read-modify-write of the store (enrollment, alumni removal) holds
+``STORE_UPDATE_LOCK`` from load to save, so updates never overwrite
+each other.
+
+The parsed files are cached per process and only re-read when either
+file's mtime or size changes, so repeated loads skip disk I/O entirely.
+
+Functions:
+    - load_biometrics_store()   → Returns the full store keyed by student_id.
+    - save_biometrics_store()   → Persists the full store to both files.
+    - remove_students()         → Deletes matching students straight from
+                                  the raw metadata and matrix.
+    - load_encoding_matrix()    → Returns every encoding as one matrix plus
+                                  parallel per-row student details.
+    - normalise_encodings()     → Scales encoding rows to unit length.
+    - distinct_encoding_indices() → Picks the rows that aren't near-duplicates.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import threading
+import time
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from config import settings
+from models.schemas import EncodingRecord, StudentBiometricRecord
+
+# Length of a face_recognition encoding vector
+ENCODING_DIMENSIONS = 128
+
+# dtype of the on-disk encoding matrix
+ENCODING_DTYPE = np.float32
+
+# A student's encoding at least this cosine-similar to one already kept
+# is redundant: near-identical photos add match-time cost, not accuracy
+NEAR_DUPLICATE_SIMILARITY = 0.97
+
+# Reads of the two store files tried before a metadata / matrix mismatch
+# is reported, and the pause between tries (a save's renames take
+# microseconds, so a retry normally sees both new files)
+STORE_READ_ATTEMPTS = 3
+STORE_READ_RETRY_SECONDS = 0.05
+
+# Held across a whole load → modify → save of the store
+STORE_UPDATE_LOCK = threading.Lock()
+
+# (mtime_ns, size) of both store files, or None for a missing file
+_StoreVersion = Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]
+
+# Last parsed (version, raw metadata, encoding matrix). Callers only
+# read from it: models and per-row lists are always built fresh.
+_store_cache: Optional[Tuple[_StoreVersion, dict, np.ndarray]] = None
+_store_cache_lock = threading.Lock()
+
+# Match matrix and parallel lists built from the cached metadata object
+# above; reused until a store change replaces that object.
+_EncodingMatrix = Tuple[np.ndarray, List[str], List[str], List[Optional[str]]]
+_encoding_matrix_cache: Optional[Tuple[dict, _EncodingMatrix]] = None
+_encoding_matrix_cache_lock = threading.Lock()
+
+
+# ──────────────────────────────────────────────
+#  Normalisation
+# ──────────────────────────────────────────────
+
+
+def normalise_encodings(encodings: np.ndarray) -> np.ndarray:
+    """
+    Return *encodings* (one vector, or one per row) scaled to unit L2
+    length as ``float32``. For unit vectors, Euclidean distance is
+    ``sqrt(2 - 2 * a @ b)``, so matching needs no subtraction per pair.
+    """
+    encodings = np.asarray(encodings, dtype=ENCODING_DTYPE)
+    norms = np.linalg.norm(encodings, axis=-1, keepdims=True)
+    # An all-zero vector has no direction; leave it as is
+    return encodings / np.where(norms > 0, norms, 1).astype(ENCODING_DTYPE)
+
+
+def distinct_encoding_indices(encodings: np.ndarray) -> List[int]:
+    """
+    Greedily pick rows of a unit-row matrix in order, skipping any row
+    whose cosine similarity to an already picked one exceeds
+    ``NEAR_DUPLICATE_SIMILARITY``, and return the picked row indices.
+
+    One student has a few dozen encodings at most, so all pairwise
+    similarities come from a single small matrix product.
+    """
+    similarities = encodings @ encodings.T
+
+    kept_indices: List[int] = []
+    for row_index in range(len(encodings)):
+        if (
+            kept_indices
+            and similarities[row_index, kept_indices].max() > NEAR_DUPLICATE_SIMILARITY
+        ):
+            continue
+        kept_indices.append(row_index)
+
+    return kept_indices
+
+
+# ──────────────────────────────────────────────
+#  Raw file access
+# ──────────────────────────────────────────────
+
+
+def _file_version(file_path: str) -> Optional[Tuple[int, int]]:
+    """Return ``(mtime_ns, size)`` for *file_path*, or ``None`` if missing."""
+    try:
+        file_stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def _store_version() -> _StoreVersion:
+    """Return the current version of both store files."""
+    return (
+        _file_version(settings.biometrics_path_str),
+        _file_version(settings.biometrics_matrix_path_str),
+    )
+
+
+class _StoreFilesMismatch(ValueError):
+    """The metadata and the matrix read from disk come from different saves."""
+
+
+def _matrix_digest(encoding_matrix: np.ndarray) -> str:
+    """Return a short hash of *encoding_matrix*'s contents."""
+    return hashlib.blake2b(
+        np.ascontiguousarray(encoding_matrix).data, digest_size=16
+    ).hexdigest()
+
+
+def _read_store_files() -> Tuple[dict, np.ndarray]:
+    """
+    Return the raw JSON metadata and the encoding matrix, from the
+    in-process cache when neither file has changed since the last read.
+
+    A read that pairs metadata with a matrix from another save (a save
+    in another process was between its two renames) is retried up to
+    ``STORE_READ_ATTEMPTS`` times before the mismatch is raised.
+
+    The returned objects are shared; callers must not modify them.
+    """
+    global _store_cache
+
+    with _store_cache_lock:
+        for attempt in range(1, STORE_READ_ATTEMPTS + 1):
+            current_version = _store_version()
+            if _store_cache is not None and _store_cache[0] == current_version:
+                return _store_cache[1], _store_cache[2]
+
+            try:
+                raw_data, encoding_matrix = _read_store_files_uncached()
+            except _StoreFilesMismatch:
+                if attempt == STORE_READ_ATTEMPTS:
+                    raise
+                time.sleep(STORE_READ_RETRY_SECONDS)
+                continue
+
+            _store_cache = (current_version, raw_data, encoding_matrix)
+            return raw_data, encoding_matrix
+
+
+def _read_store_files_uncached() -> Tuple[dict, np.ndarray]:
+    """
+    Read the raw JSON metadata and the encoding matrix from disk.
+
+    The matrix is memory-mapped read-only, so rows are only paged in
+    when sliced. Either part is empty when its file doesn't exist yet.
+    """
+    empty_matrix = np.empty((0, ENCODING_DIMENSIONS), dtype=ENCODING_DTYPE)
+
+    biometrics_path = settings.biometrics_path_str
+    if not os.path.exists(biometrics_path) or os.path.getsize(biometrics_path) == 0:
+        return {}, empty_matrix
+
+    # Parse straight from a read-only map of the file rather than first
+    # copying it into a bytes object, halving peak memory for big stores.
+    with open(biometrics_path, "rb") as biometrics_file, mmap.mmap(
+        biometrics_file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as biometrics_map, memoryview(biometrics_map) as biometrics_view:
+        raw_data: dict = orjson.loads(biometrics_view)
+
+    matrix_path = settings.biometrics_matrix_path_str
+    if os.path.exists(matrix_path):
+        encoding_matrix = np.load(matrix_path, mmap_mode="r")
+    else:
+        encoding_matrix = empty_matrix
+
+    stored_row_count = 0
+    expected_digests = set()
+    for record_dict in raw_data.values():
+        if "encoding_offset" in record_dict:
+            stored_row_count += len(record_dict.get("encodings", ()))
+            expected_digests.add(record_dict.get("matrix_digest"))
+
+    if stored_row_count != encoding_matrix.shape[0]:
+        raise _StoreFilesMismatch(
+            f"Biometrics metadata lists {stored_row_count} encodings but "
+            f"the encoding matrix has {encoding_matrix.shape[0]} rows."
+        )
+
+    # Stores saved before digests were recorded only get the row check
+    expected_digests.discard(None)
+    if expected_digests and expected_digests != {_matrix_digest(encoding_matrix)}:
+        raise _StoreFilesMismatch(
+            "Biometrics metadata was saved with a different encoding matrix."
+        )
+
+    return raw_data, encoding_matrix
+
+
+def _encoding_rows(
+    record_dict: dict,
+    encoding_matrix: np.ndarray,
+) -> List[np.ndarray]:
+    """
+    Return one encoding vector per entry of a raw student record,
+    from the matrix or, for legacy records, from the embedded floats.
+    """
+    encoding_entries = record_dict.get("encodings", [])
+    encoding_offset: Optional[int] = record_dict.get("encoding_offset")
+
+    if encoding_offset is None:
+        return [
+            np.asarray(entry["encoding"], dtype=ENCODING_DTYPE)
+            for entry in encoding_entries
+        ]
+
+    block = encoding_matrix[encoding_offset:encoding_offset + len(encoding_entries)]
+    return list(block)
+
+
+# ──────────────────────────────────────────────
+#  Public API
+# ──────────────────────────────────────────────
+
+
+def load_biometrics_store() -> Dict[str, StudentBiometricRecord]:
+    """
+    Load the biometrics store and return a dict keyed by student_id.
+
+    Everything on disk was validated when it was saved, so the records
+    are built with ``model_construct`` and skip Pydantic validation.
+    """
+    raw_data, encoding_matrix = _read_store_files()
+
+    store: Dict[str, StudentBiometricRecord] = {}
+    for student_id, record_dict in raw_data.items():
+        encoding_rows = _encoding_rows(record_dict, encoding_matrix)
+        store[student_id] = StudentBiometricRecord.model_construct(
+            student_id=record_dict["student_id"],
+            student_name=record_dict["student_name"],
+            division=record_dict.get("division"),
+            graduation_year=record_dict.get("graduation_year"),
+            encodings=[
+                EncodingRecord.model_construct(
+                    encoding=encoding_row.tolist(),
+                    registered_at=datetime.fromisoformat(entry["registered_at"]),
+                )
+                for entry, encoding_row in zip(
+                    record_dict["encodings"], encoding_rows
+                )
+            ],
+        )
+
+    return store
+
+
+def save_biometrics_store(store: Dict[str, StudentBiometricRecord]) -> None:
+    """
+    Persist the full biometrics store: metadata to JSON and every
+    encoding, unit-normalised, to the ``.npy`` matrix, in the same
+    student order.
+
+    Each student's near-duplicate encodings are dropped (the oldest of
+    a similar group is kept), and the records in *store* are trimmed to
+    match what was written.
+    """
+    serialisable: dict = {}
+    encoding_blocks: List[np.ndarray] = []
+    stored_row_count = 0
+    for student_id, record in store.items():
+        if record.encodings:
+            student_matrix = normalise_encodings(
+                [encoding_entry.encoding for encoding_entry in record.encodings]
+            )
+            kept_indices = distinct_encoding_indices(student_matrix)
+            if len(kept_indices) < len(record.encodings):
+                record.encodings = [record.encodings[index] for index in kept_indices]
+                student_matrix = student_matrix[kept_indices]
+            encoding_blocks.append(student_matrix)
+
+        serialisable[student_id] = {
+            "student_id": record.student_id,
+            "student_name": record.student_name,
+            "division": record.division,
+            "graduation_year": record.graduation_year,
+            "encoding_offset": stored_row_count,
+            "encodings": [
+                {"registered_at": encoding_entry.registered_at}
+                for encoding_entry in record.encodings
+            ],
+        }
+        stored_row_count += len(record.encodings)
+
+    encoding_matrix = (
+        np.concatenate(encoding_blocks)
+        if encoding_blocks
+        else np.empty((0, ENCODING_DIMENSIONS), dtype=ENCODING_DTYPE)
+    )
+
+    _write_store_files(serialisable, encoding_matrix)
+
+
+def remove_students(
+    should_remove: Callable[[dict], bool],
+) -> Tuple[List[dict], int]:
+    """
+    Delete every student whose raw JSON record satisfies *should_remove*
+    and persist the result, under ``STORE_UPDATE_LOCK``.
+
+    Works on the raw metadata and matrix directly: kept students' rows
+    are sliced out of the matrix and their offsets renumbered, without
+    building a Pydantic model or a Python float list per encoding.
+
+    Returns:
+        removed_records  – the raw records removed (nothing is written
+                           when this is empty)
+        students_checked – how many students the store held beforehand
+    """
+    with STORE_UPDATE_LOCK:
+        raw_data, stored_matrix = _read_store_files()
+
+        removed_records: List[dict] = []
+        kept_metadata: dict = {}
+        kept_blocks: List[np.ndarray] = []
+        kept_row_count = 0
+
+        for student_id, record_dict in raw_data.items():
+            if should_remove(record_dict):
+                removed_records.append(record_dict)
+                continue
+
+            encoding_entries = record_dict.get("encodings", [])
+            kept_metadata[student_id] = {
+                **record_dict,
+                "encoding_offset": kept_row_count,
+                # Drops the embedded floats of legacy records
+                "encodings": [
+                    {"registered_at": entry["registered_at"]}
+                    for entry in encoding_entries
+                ],
+            }
+            if encoding_entries:
+                kept_blocks.append(
+                    np.asarray(
+                        _encoding_rows(record_dict, stored_matrix),
+                        dtype=ENCODING_DTYPE,
+                    )
+                )
+            kept_row_count += len(encoding_entries)
+
+        if removed_records:
+            encoding_matrix = (
+                np.concatenate(kept_blocks)
+                if kept_blocks
+                else np.empty((0, ENCODING_DIMENSIONS), dtype=ENCODING_DTYPE)
+            )
+            _write_store_files(kept_metadata, encoding_matrix)
+
+        return removed_records, len(raw_data)
+
+
+def _replace_file_atomically(
+    file_path: str,
+    write_contents: Callable[[BinaryIO], object],
+) -> None:
+    """
+    Write a new version of *file_path* through *write_contents* into a
+    temp file, fsync it, and rename it over the original, so the path
+    always holds either the complete old or the complete new file.
+    """
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "wb") as temp_file:
+        write_contents(temp_file)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, file_path)
+
+
+def _write_store_files(metadata: dict, encoding_matrix: np.ndarray) -> None:
+    """
+    Write *metadata* to the JSON file and *encoding_matrix* to the
+    ``.npy``, stamping every record with the matrix's digest.
+    *metadata* must be a fresh dict the caller owns.
+    """
+    global _store_cache
+
+    os.makedirs(settings.data_path_str, exist_ok=True)
+    matrix_digest = _matrix_digest(encoding_matrix)
+    for record_dict in metadata.values():
+        record_dict["matrix_digest"] = matrix_digest
+
+    serialised_metadata = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+
+    # Both files are written under the cache lock so loads in this
+    # process never see one half of a save.
+    with _store_cache_lock:
+        # Dropped first so a failed write can't leave a stale cache.
+        _store_cache = None
+
+        # Readers may have the old matrix memory-mapped, and truncating a
+        # mapped file in place would crash them; a crash mid-write must
+        # not leave a half-written JSON file either.
+        _replace_file_atomically(
+            settings.biometrics_matrix_path_str,
+            lambda matrix_file: np.save(matrix_file, encoding_matrix),
+        )
+        _replace_file_atomically(
+            settings.biometrics_path_str,
+            lambda biometrics_file: biometrics_file.write(serialised_metadata),
+        )
+
+        # What was just written is what the next load would parse.
+        _store_cache = (
+            _store_version(),
+            orjson.loads(serialised_metadata),
+            encoding_matrix,
+        )
+
+
+def load_encoding_matrix() -> _EncodingMatrix:
+    """
+    Load every stored encoding for matching, without building any
+    Pydantic models.
+
+    Rows are unit length; rows saved before enrollment normalised them
+    are normalised here, so callers can always match by dot product.
+    The result is built once per store version and shared; callers must
+    not modify it.
+
+    Returns:
+        encoding_matrix  – (N, 128) unit-row ``float32`` matrix
+        student_ids      – parallel list of student IDs
+        student_names    – parallel list of student names
+        divisions        – parallel list of divisions (may be None)
+    """
+    global _encoding_matrix_cache
+
+    raw_data, stored_matrix = _read_store_files()
+
+    with _encoding_matrix_cache_lock:
+        # The file cache hands back the same metadata object until either
+        # store file changes (its mtime or size), so identity is the key.
+        if (
+            _encoding_matrix_cache is not None
+            and _encoding_matrix_cache[0] is raw_data
+        ):
+            return _encoding_matrix_cache[1]
+
+        encoding_matrix = _build_encoding_matrix(raw_data, stored_matrix)
+        encoding_matrix[0].flags.writeable = False
+        _encoding_matrix_cache = (raw_data, encoding_matrix)
+        return encoding_matrix
+
+
+def _build_encoding_matrix(
+    raw_data: dict, stored_matrix: np.ndarray
+) -> _EncodingMatrix:
+    """Build the match matrix and parallel lists from the raw store."""
+    student_ids: List[str] = []
+    student_names: List[str] = []
+    divisions: List[Optional[str]] = []
+
+    # Saved stores keep every student's rows contiguous and in order, so
+    # the matrix on disk already is the match matrix: one pass over the
+    # memory map replaces slicing and re-stacking it row by row.
+    if all("encoding_offset" in record_dict for record_dict in raw_data.values()):
+        for record_dict in raw_data.values():
+            row_count = len(record_dict["encodings"])
+            student_ids.extend([record_dict["student_id"]] * row_count)
+            student_names.extend([record_dict["student_name"]] * row_count)
+            divisions.extend([record_dict.get("division")] * row_count)
+        return (
+            normalise_encodings(stored_matrix),
+            student_ids,
+            student_names,
+            divisions,
+        )
+
+    # Store still holds legacy records with embedded floats
+    encoding_rows: List[np.ndarray] = []
+
+    for record_dict in raw_data.values():
+        record_rows = _encoding_rows(record_dict, stored_matrix)
+        encoding_rows.extend(record_rows)
+        student_ids.extend([record_dict["student_id"]] * len(record_rows))
+        student_names.extend([record_dict["student_name"]] * len(record_rows))
+        divisions.extend([record_dict.get("division")] * len(record_rows))
+
+    if not encoding_rows:
+        return (
+            np.empty((0, ENCODING_DIMENSIONS), dtype=ENCODING_DTYPE),
+            [], [], [],
+        )
+
+    return (
+        normalise_encodings(np.stack(encoding_rows)),
+        student_ids,
+        student_names,
+        divisions,
+    )
@@ -4,17 +4,36 @@ CSV Data Manager
 Provides utility functions to initialise, read, and append records
 to the attendance_logs.csv using **Pandas** (per project standards).
 
+Duplicate checks use an in-memory index of the CSV that is kept in step
+with the file on disk: rows appended by other processes are read from
+the new tail only, and the file is re-parsed in full only after it has
+been rewritten. New rows are appended as single ``csv`` lines.
+
 Functions:
     - initialize_csv()         → Ensures the CSV and data directory exist.
     - mark_student_present()   → Appends a "present" record for a student.
     - fetch_daily_roster()     → Returns all attendance records for a date.
+    - close_attendance_log()   → Closes the long-lived append handle.
 """
 
 from __future__ import annotations
 
+import csv
+import io
+import os
+import threading
 from datetime import date, datetime
-from pathlib import Path
-from typing import List, Optional
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import pandas as pd
 
@@ -32,9 +51,176 @@ ATTENDANCE_COLUMNS: List[str] = [
 ]
 
 
-def _csv_path() -> Path:
+def _csv_path() -> str:
     """Return the resolved path to the attendance CSV file."""
-    return settings.attendance_csv_path
+    return settings.attendance_csv_path_str
+
+
+def _read_attendance_dataframe(csv_path: str) -> pd.DataFrame:
+    """
+    Parse only the known columns of the attendance CSV, every one as a
+    string, with pandas' C parser.
+
+    Values are never type-inferred: student IDs such as ``0012`` keep
+    their leading zeros, and only empty cells become missing (NaN) —
+    text such as ``"NA"`` or ``"None"`` stays text — so a full rewrite
+    writes back exactly what was read.
+    """
+    return pd.read_csv(
+        csv_path,
+        dtype=str,
+        usecols=ATTENDANCE_COLUMNS,
+        keep_default_na=False,
+        na_values=[""],
+        engine="c",
+    )
+
+
+def _record_from_row(row: Mapping[str, Any]) -> AttendanceRecord:
+    """
+    Build an ``AttendanceRecord`` from a CSV row (column → value, from
+    pandas or ``csv.DictReader``) without re-validating it.
+
+    Rows in the CSV were validated when they were written, so
+    ``model_construct`` is used to skip Pydantic's per-field checks.
+    """
+    division = row.get("division")
+    return AttendanceRecord.model_construct(
+        student_id=row["student_id"],
+        student_name=row["student_name"],
+        # Empty cells are NaN from pandas and "" from the csv module
+        division=division if isinstance(division, str) and division else None,
+        date=row["date"],
+        time=row["time"],
+        status=row["status"],
+    )
+
+
+# ──────────────────────────────────────────────
+#  In-memory attendance index
+# ──────────────────────────────────────────────
+
+# (inode, mtime_ns, size) of the CSV the index was built from. Video
+# workers run in other processes, so the file on disk is the source of
+# truth. Rewrites always swap in a new inode (see _rewrite_csv_locked),
+# so the same inode with a larger size means rows were only appended.
+_index_version: Optional[Tuple[int, int, int]] = None
+# (student_id, date) → first "present" row for that student and day
+_present_rows: Dict[Tuple[str, str], Dict[str, str]] = {}
+# Every (student_id, date) that has a row, whatever its status
+_recorded_keys: Set[Tuple[str, str]] = set()
+_index_lock = threading.Lock()
+
+# Unbuffered O_APPEND handle kept open for appending rows, so marking
+# attendance costs one write() instead of an open/write/close per row
+_append_file: Optional[BinaryIO] = None
+
+
+def _csv_version(csv_path: str) -> Tuple[int, int, int]:
+    """Return the CSV's ``(inode, mtime_ns, size)``."""
+    csv_stat = os.stat(csv_path)
+    return csv_stat.st_ino, csv_stat.st_mtime_ns, csv_stat.st_size
+
+
+def _index_rows(rows: Iterable[Dict[str, str]]) -> None:
+    """Add CSV rows to the index. The caller must hold ``_index_lock``."""
+    for row in rows:
+        row_key = (row["student_id"], row["date"])
+        _recorded_keys.add(row_key)
+        if row["status"] == "present":
+            _present_rows.setdefault(row_key, row)
+
+
+def _refresh_index_locked(csv_path: str) -> None:
+    """
+    Rebuild the index if the CSV changed since it was last read.
+    The caller must hold ``_index_lock``.
+    """
+    global _index_version
+
+    current_version = _csv_version(csv_path)
+    if current_version == _index_version:
+        return
+
+    if (
+        _index_version is not None
+        and current_version[0] == _index_version[0]
+        and current_version[2] > _index_version[2] > 0
+    ):
+        # Only whole lines are ever appended after the header, so the old
+        # size is the start of a line: parse just the rows added since.
+        with open(csv_path, "rb") as csv_file:
+            csv_file.seek(_index_version[2])
+            appended_text = csv_file.read().decode("utf-8")
+        _index_rows(
+            csv.DictReader(
+                io.StringIO(appended_text, newline=""),
+                fieldnames=ATTENDANCE_COLUMNS,
+            )
+        )
+    else:
+        _present_rows.clear()
+        _recorded_keys.clear()
+        with open(csv_path, newline="", encoding="utf-8") as csv_file:
+            _index_rows(csv.DictReader(csv_file))
+
+    _index_version = current_version
+
+
+def _append_handle_locked(csv_path: str) -> BinaryIO:
+    """
+    Return the shared append handle for the CSV, (re)opening it if the
+    file it points at has been removed or replaced since.
+    The caller must hold ``_index_lock``.
+    """
+    global _append_file
+
+    if _append_file is not None:
+        # A removed or rewritten (renamed-over, see _rewrite_csv_locked)
+        # file has no links left, so its handle must be reopened.
+        if os.fstat(_append_file.fileno()).st_nlink > 0:
+            return _append_file
+        _append_file.close()
+
+    _append_file = open(csv_path, "ab", buffering=0)
+    return _append_file
+
+
+def _append_record_locked(csv_path: str, record: AttendanceRecord) -> None:
+    """
+    Append *record* as one CSV line and add it to the index.
+    The caller must hold ``_index_lock`` and have refreshed the index.
+    """
+    global _index_version
+
+    row = record.model_dump()
+    line_buffer = io.StringIO()
+    # "\n" matches the line endings pandas writes for the header
+    csv.writer(line_buffer, lineterminator="\n").writerow(
+        [row[column] for column in ATTENDANCE_COLUMNS]
+    )
+    line_bytes = line_buffer.getvalue().encode("utf-8")
+
+    # One write on an O_APPEND file, so rows appended concurrently by
+    # video workers in other processes never interleave.
+    _append_handle_locked(csv_path).write(line_bytes)
+
+    row_key = (record.student_id, record.date)
+    _recorded_keys.add(row_key)
+    if record.status == "present":
+        _present_rows.setdefault(row_key, row)
+
+    # If the file grew by exactly our line, nobody else wrote in between
+    # and the index is still complete; otherwise re-read it next time.
+    new_version = _csv_version(csv_path)
+    if (
+        _index_version is not None
+        and new_version[0] == _index_version[0]
+        and new_version[2] == _index_version[2] + len(line_bytes)
+    ):
+        _index_version = new_version
+    else:
+        _index_version = None
 
 
 def initialize_csv() -> None:
@@ -43,13 +229,33 @@ def initialize_csv() -> None:
     If the CSV is missing or empty, create it with the correct header row.
     """
     csv_path = _csv_path()
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
 
-    if not csv_path.exists() or csv_path.stat().st_size == 0:
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
         empty_dataframe = pd.DataFrame(columns=ATTENDANCE_COLUMNS)
         empty_dataframe.to_csv(csv_path, index=False)
 
 
+def _rewrite_csv_locked(csv_path: str, dataframe: pd.DataFrame) -> None:
+    """
+    Replace the CSV with *dataframe* via a temp file and rename. The new
+    inode tells every process's index to re-read the file in full.
+    The caller must hold ``_index_lock``.
+    """
+    temp_path = csv_path + ".tmp"
+    dataframe.to_csv(temp_path, index=False)
+    os.replace(temp_path, csv_path)
+
+
+def close_attendance_log() -> None:
+    """Close the long-lived append handle, if this process opened one."""
+    global _append_file
+    with _index_lock:
+        if _append_file is not None:
+            _append_file.close()
+            _append_file = None
+
+
 def mark_student_present(
     student_id: str,
     student_name: str,
@@ -75,44 +281,27 @@ def mark_student_present(
     csv_path = _csv_path()
 
     now = datetime.now()
-    attendance_date = target_date or now.date()
+    attendance_date = (target_date or now.date()).isoformat()
     attendance_time = now.strftime("%H:%M:%S")
 
-    # Read current data to check for duplicates
-    existing_dataframe = pd.read_csv(csv_path, dtype=str)
+    with _index_lock:
+        _refresh_index_locked(csv_path)
 
-    duplicate_mask = (
-        (existing_dataframe["student_id"] == student_id)
-        & (existing_dataframe["date"] == str(attendance_date))
-        & (existing_dataframe["status"] == "present")
-    )
+        existing_row = _present_rows.get((student_id, attendance_date))
+        if existing_row is not None:
+            # Return the first existing record instead of duplicating
+            return _record_from_row(existing_row)
 
-    if duplicate_mask.any():
-        # Return the first existing record instead of duplicating
-        existing_row = existing_dataframe.loc[duplicate_mask].iloc[0]
-        return AttendanceRecord(
-            student_id=existing_row["student_id"],
-            student_name=existing_row["student_name"],
-            division=existing_row["division"] if pd.notna(existing_row.get("division")) else None,
-            date=date.fromisoformat(existing_row["date"]),
-            time=existing_row["time"],
-            status=existing_row["status"],
+        # Build new record
+        new_record = AttendanceRecord(
+            student_id=student_id,
+            student_name=student_name,
+            division=division,
+            date=attendance_date,
+            time=attendance_time,
+            status="present",
         )
-
-    # Build new record
-    new_record = AttendanceRecord(
-        student_id=student_id,
-        student_name=student_name,
-        division=division,
-        date=attendance_date,
-        time=attendance_time,
-        status="present",
-    )
-
-    new_row_dataframe = pd.DataFrame([new_record.model_dump()])
-    # Ensure date is serialised as a string
-    new_row_dataframe["date"] = new_row_dataframe["date"].astype(str)
-    new_row_dataframe.to_csv(csv_path, mode="a", header=False, index=False)
+        _append_record_locked(csv_path, new_record)
 
     return new_record
 
@@ -130,30 +319,21 @@ def fetch_daily_roster(target_date: Optional[date] = None) -> List[AttendanceRec
     initialize_csv()
     csv_path = _csv_path()
 
-    attendance_date = target_date or date.today()
+    attendance_date = (target_date or date.today()).isoformat()
 
-    full_dataframe = pd.read_csv(csv_path, dtype=str)
+    full_dataframe = _read_attendance_dataframe(csv_path)
 
     if full_dataframe.empty:
         return []
 
-    day_mask = full_dataframe["date"] == str(attendance_date)
-    day_dataframe = full_dataframe.loc[day_mask]
-
-    records: List[AttendanceRecord] = []
-    for _, row in day_dataframe.iterrows():
-        records.append(
-            AttendanceRecord(
-                student_id=row["student_id"],
-                student_name=row["student_name"],
-                division=row["division"] if pd.notna(row.get("division")) else None,
-                date=date.fromisoformat(row["date"]),
-                time=row["time"],
-                status=row["status"],
-            )
-        )
+    day_mask = full_dataframe["date"] == attendance_date
+    day_dataframe = full_dataframe.loc[day_mask, ATTENDANCE_COLUMNS]
 
-    return records
+    # Plain value tuples: itertuples doesn't box every row into a Series
+    return [
+        _record_from_row(dict(zip(ATTENDANCE_COLUMNS, row_values)))
+        for row_values in day_dataframe.itertuples(index=False, name=None)
+    ]
 
 
 def manual_override_attendance(
@@ -184,37 +364,43 @@ def manual_override_attendance(
     csv_path = _csv_path()
 
     now = datetime.now()
-    attendance_date = target_date or now.date()
+    attendance_date = (target_date or now.date()).isoformat()
     attendance_time = now.strftime("%H:%M:%S")
 
-    existing_dataframe = pd.read_csv(csv_path, dtype=str)
+    with _index_lock:
+        _refresh_index_locked(csv_path)
+
+        # Check if a record already exists for this student on this date
+        if (student_id, attendance_date) not in _recorded_keys:
+            # No existing record — append a new one
+            new_record = AttendanceRecord(
+                student_id=student_id,
+                student_name=student_name,
+                division=division,
+                date=attendance_date,
+                time=attendance_time,
+                status=status,
+            )
+            _append_record_locked(csv_path, new_record)
+            return new_record
 
-    # Check if a record already exists for this student on this date
-    duplicate_mask = (
-        (existing_dataframe["student_id"] == student_id)
-        & (existing_dataframe["date"] == str(attendance_date))
-    )
+        # Rare path: rewrite the file with the existing row updated
+        existing_dataframe = _read_attendance_dataframe(csv_path)
+
+        duplicate_mask = (
+            (existing_dataframe["student_id"] == student_id)
+            & (existing_dataframe["date"] == attendance_date)
+        )
 
-    if duplicate_mask.any():
         # Update the existing row's status and time in place
         existing_dataframe.loc[duplicate_mask, "status"] = status
         existing_dataframe.loc[duplicate_mask, "time"] = attendance_time
         existing_dataframe.loc[duplicate_mask, "student_name"] = student_name
         if division is not None:
             existing_dataframe.loc[duplicate_mask, "division"] = division
-        existing_dataframe.to_csv(csv_path, index=False)
+        _rewrite_csv_locked(csv_path, existing_dataframe)
 
-        return AttendanceRecord(
-            student_id=student_id,
-            student_name=student_name,
-            division=division,
-            date=attendance_date,
-            time=attendance_time,
-            status=status,
-        )
-
-    # No existing record — append a new one
-    new_record = AttendanceRecord(
+    return AttendanceRecord(
         student_id=student_id,
         student_name=student_name,
         division=division,
@@ -222,9 +408,3 @@ def manual_override_attendance(
         time=attendance_time,
         status=status,
     )
-
-    new_row_dataframe = pd.DataFrame([new_record.model_dump()])
-    new_row_dataframe["date"] = new_row_dataframe["date"].astype(str)
-    new_row_dataframe.to_csv(csv_path, mode="a", header=False, index=False)
-
-    return new_record
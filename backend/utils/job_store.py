@@ -0,0 +1,178 @@
+"""
+Processing Job Store
+====================
+Keeps the status of background video-processing jobs in memory and
+persists every update to an append-only JSON-lines write-ahead log
+next to the ``processing_jobs.json`` snapshot.
+
+- Reads (status polls) are a dict lookup with no disk I/O.
+- Each update appends one line to the WAL instead of rewriting the
+  whole jobs file.
+- The WAL is folded back into the snapshot every
+  ``COMPACT_EVERY_N_UPDATES`` updates and on application shutdown.
+
+Functions:
+    - get_job()                   → Returns the stored data for a job, or ``None``.
+    - find_job_by_content_hash()  → Returns the latest job for an uploaded video's hash.
+    - save_job()                  → Records a new state for a job.
+    - compact_jobs()              → Rewrites the snapshot and truncates the WAL.
+    - fail_interrupted_jobs()     → Marks jobs left "processing" by a previous
+                                    run as failed.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+
+from config import settings
+
+logger = logging.getLogger("job_store")
+logger.setLevel(logging.INFO)
+
+# Fold the WAL into the snapshot after this many appended updates
+COMPACT_EVERY_N_UPDATES = 100
+
+# Error recorded on jobs the server stopped before they could finish
+INTERRUPTED_JOB_ERROR = "Interrupted: the server stopped before the job finished."
+
+_JOBS_LOCK = threading.Lock()
+
+
+def _wal_path() -> str:
+    """Return the path of the JSON-lines WAL that sits beside the snapshot."""
+    return settings.jobs_path_str + ".wal"
+
+
+def _read_jobs_from_disk() -> Dict[str, dict]:
+    """Load the snapshot, then replay any WAL entries written after it."""
+    jobs: Dict[str, dict] = {}
+
+    jobs_path = settings.jobs_path_str
+    if os.path.exists(jobs_path) and os.path.getsize(jobs_path) > 0:
+        with open(jobs_path, "rb") as jobs_file:
+            jobs.update(orjson.loads(jobs_file.read()))
+
+    wal_path = _wal_path()
+    if os.path.exists(wal_path):
+        with open(wal_path, "rb") as wal_file:
+            for line in wal_file:
+                try:
+                    jobs.update(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    # A torn final line from a crash mid-append — skip it.
+                    logger.warning("Skipping unreadable job WAL line.")
+
+    return jobs
+
+
+_JOBS: Dict[str, dict] = _read_jobs_from_disk()
+_updates_since_compaction: int = 0
+
+# Upload content hash → ID of the most recent job for that video
+_JOB_IDS_BY_CONTENT_HASH: Dict[str, str] = {
+    job_data["content_hash"]: job_id
+    for job_id, job_data in _JOBS.items()
+    if job_data.get("content_hash")
+}
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Return the latest stored data for *job_id*, or ``None``."""
+    return _JOBS.get(job_id)
+
+
+def find_job_by_content_hash(content_hash: str) -> Optional[str]:
+    """Return the ID of the latest job whose upload hashed to *content_hash*."""
+    return _JOB_IDS_BY_CONTENT_HASH.get(content_hash)
+
+
+def save_job(job_id: str, job_data: dict) -> None:
+    """
+    Record *job_data* as the current state of *job_id*.
+
+    The in-memory store is updated immediately and a single line is
+    appended to the WAL; the snapshot is rewritten only periodically.
+    """
+    global _updates_since_compaction
+
+    wal_line = orjson.dumps({job_id: job_data}, default=str) + b"\n"
+
+    with _JOBS_LOCK:
+        _JOBS[job_id] = job_data
+        if job_data.get("content_hash"):
+            _JOB_IDS_BY_CONTENT_HASH[job_data["content_hash"]] = job_id
+
+        wal_path = _wal_path()
+        os.makedirs(os.path.dirname(wal_path), exist_ok=True)
+        with open(wal_path, "ab") as wal_file:
+            wal_file.write(wal_line)
+
+        _updates_since_compaction += 1
+        if _updates_since_compaction >= COMPACT_EVERY_N_UPDATES:
+            _compact_locked()
+
+
+def fail_interrupted_jobs() -> List[str]:
+    """
+    Mark every job still "processing" in the store as failed.
+
+    Call once at startup, before any job is submitted: such records were
+    left by a previous run that stopped (or crashed) mid-job, and nothing
+    will ever finish them. Their content hash is kept, so a re-upload of
+    the same video starts a fresh job instead of reusing a dead one.
+
+    Returns:
+        The IDs of the jobs marked failed.
+    """
+    with _JOBS_LOCK:
+        interrupted_jobs = [
+            (job_id, job_data)
+            for job_id, job_data in _JOBS.items()
+            if job_data.get("status") == "processing"
+        ]
+
+    for job_id, job_data in interrupted_jobs:
+        logger.warning("Marking interrupted job %s as failed.", job_id)
+        save_job(job_id, {
+            "status": "failed",
+            "video_filename": job_data.get("video_filename"),
+            "error": INTERRUPTED_JOB_ERROR,
+            "completed_at": datetime.now().isoformat(),
+            "content_hash": job_data.get("content_hash"),
+        })
+
+    return [job_id for job_id, _ in interrupted_jobs]
+
+
+def compact_jobs() -> None:
+    """Write the full job store to the snapshot and truncate the WAL."""
+    with _JOBS_LOCK:
+        _compact_locked()
+
+
+def _compact_locked() -> None:
+    """Compaction body; the caller must hold ``_JOBS_LOCK``."""
+    global _updates_since_compaction
+
+    jobs_path = settings.jobs_path_str
+    os.makedirs(os.path.dirname(jobs_path), exist_ok=True)
+
+    # Write to a temp file and swap it in so a crash never leaves a
+    # half-written snapshot behind.
+    temp_path = jobs_path + ".tmp"
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(orjson.dumps(_JOBS, default=str))
+    os.replace(temp_path, jobs_path)
+
+    # Every WAL entry is now in the snapshot.
+    wal_path = _wal_path()
+    if os.path.exists(wal_path):
+        os.remove(wal_path)
+
+    _updates_since_compaction = 0
@@ -6,12 +6,14 @@ Core utility module that processes an uploaded class video.
 Workflow (per ARCHITECTURE.md §3B):
 1.  Open the video with ``cv2.VideoCapture``.
 2.  Calculate a *frame skip* so we only analyse
-    ``FRAMES_PER_SECOND_TO_PROCESS`` frames per real-time second.
+    ``FRAMES_PER_SECOND_TO_PROCESS`` frames per real-time second;
+    a reader thread decodes and queues the sampled frames.
 3.  For each sampled frame:
     a. Detect faces and extract 128-d encodings via ``face_recognition``.
     b. Compare every detected encoding against **all** registered
-       students in ``students_biometrics.json``.
-    c. **Match** (Euclidean distance ≤ threshold) →
+       students in the biometrics store.
+    c. **Match** (Euclidean distance between unit-length encodings
+       ≤ threshold) →
        call ``mark_student_present()``.
     d. **Unknown** (distance > threshold for every student) →
        crop the face with NumPy slicing and save it to
@@ -21,27 +23,56 @@ Workflow (per ARCHITECTURE.md §3B):
 
 from __future__ import annotations
 
-import json
 import logging
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 import cv2
 import face_recognition
 import numpy as np
 
 from config import settings
-from models.schemas import (
-    EncodingRecord,
-    StudentBiometricRecord,
-    VideoProcessingResult,
-)
+from models.schemas import VideoProcessingResult
+from utils.biometrics_store import load_encoding_matrix, normalise_encodings
 from utils.csv_handler import mark_student_present
 
 logger = logging.getLogger("vision_engine")
 logger.setLevel(logging.INFO)
 
+# face_recognition's (top, right, bottom, left) face box
+FaceLocation = Tuple[int, int, int, int]
+
+# Sampled frames detected per batch_face_locations call (use_gpu_batch)
+FRAME_BATCH_SIZE = 32
+
+# Longest side, in pixels, frames are shrunk to for detection; HOG / CNN
+# cost grows with pixel count, and a classroom face at 720p still fills
+# the encoder's 150 px face chip. Unknown-face crops use the full frame.
+MAX_DETECTION_SIDE = 720
+
+# Decoded frames the reader thread may queue ahead of detection
+FRAME_QUEUE_SIZE = 8
+
+# How often (seconds) a reader blocked on a full queue checks for a stop
+FRAME_QUEUE_POLL_SECONDS = 0.1
+
+# Threads encoding and writing unknown-face JPEGs off the matching loop
+UNKNOWN_FACE_WRITER_THREADS = 4
+
+# JPEG quality of saved unknown faces (OpenCV defaults to 95); plenty for
+# a reviewer to recognise a face, with a smaller file and a faster encode
+UNKNOWN_FACE_JPEG_QUALITY = 85
+
+
+def _utc_now_iso() -> str:
+    """Return the current UTC time as a second-precision ISO string."""
+    return datetime.now(tz=timezone.utc).isoformat(timespec="seconds")
+
 
 # ──────────────────────────────────────────────
 #  Biometrics Loader
@@ -49,49 +80,337 @@ logger.setLevel(logging.INFO)
 
 
 def _load_known_encodings() -> Tuple[
-    List[np.ndarray],
+    np.ndarray,
     List[str],
     List[str],
     List[Optional[str]],
 ]:
     """
-    Load the biometric store and flatten every encoding into
-    parallel lists for efficient batch comparison.
+    Load every stored encoding as one matrix plus parallel lists for
+    efficient batch comparison.
 
     Returns:
-        known_face_encodings  – list of 128-d numpy arrays
+        known_face_encodings  – contiguous (N, 128) ``float32`` matrix, one
+                                unit-length encoding per row
         known_student_ids     – parallel list of student IDs
         known_student_names   – parallel list of student names
         known_divisions       – parallel list of divisions (may be None)
     """
-    biometrics_path = settings.biometrics_path
+    return load_encoding_matrix()
 
-    if not biometrics_path.exists() or biometrics_path.stat().st_size == 0:
-        return [], [], [], []
 
-    raw_data: dict = json.loads(biometrics_path.read_text(encoding="utf-8"))
+# ──────────────────────────────────────────────
+#  Video Decoding
+# ──────────────────────────────────────────────
 
-    known_face_encodings: List[np.ndarray] = []
-    known_student_ids: List[str] = []
-    known_student_names: List[str] = []
-    known_divisions: List[Optional[str]] = []
 
-    for student_id, record_dict in raw_data.items():
-        record = StudentBiometricRecord(**record_dict)
-        for encoding_entry in record.encodings:
-            known_face_encodings.append(
-                np.array(encoding_entry.encoding, dtype=np.float64)
-            )
-            known_student_ids.append(record.student_id)
-            known_student_names.append(record.student_name)
-            known_divisions.append(record.division)
+def _open_video_capture(video_path: str) -> cv2.VideoCapture:
+    """
+    Open *video_path* for reading.
+
+    With ``settings.use_hw_video_decode`` the FFmpeg backend is asked
+    for any hardware decoder first (NVDEC on NVIDIA GPUs); frames still
+    arrive as ordinary BGR arrays. If that can't open the file, it is
+    reopened with the default CPU decoder.
+    """
+    if settings.use_hw_video_decode:
+        video_capture = cv2.VideoCapture(
+            video_path,
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+        if video_capture.isOpened():
+            return video_capture
+        logger.warning(
+            "Hardware video decoding unavailable for %s — using CPU.", video_path
+        )
+        video_capture.release()
+
+    return cv2.VideoCapture(video_path)
 
+
+class SampledFrame(NamedTuple):
+    """A frame picked for analysis, as queued by the reader thread."""
+    frame_number: int
+    # Full-resolution frame as decoded (BGR), for cropping unknown faces
+    frame_bgr: np.ndarray
+    # RGB copy shrunk to at most MAX_DETECTION_SIDE, for detection
+    detection_rgb: np.ndarray
+    # detection_rgb size / frame_bgr size (1.0 when not shrunk)
+    detection_scale: float
+
+
+def _detection_frame(frame_bgr: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Return the RGB frame to run detection on — *frame_bgr* shrunk so its
+    longest side is at most ``MAX_DETECTION_SIDE`` — and the scale applied.
+
+    Shrinking happens before the colour conversion, so only the small
+    frame is ever converted; the full frame stays BGR for cropping.
+    """
+    height, width = frame_bgr.shape[:2]
+    scale = MAX_DETECTION_SIDE / max(height, width)
+    if scale >= 1.0:
+        return cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB), 1.0
+
+    detection_bgr = cv2.resize(
+        frame_bgr,
+        (max(1, int(width * scale)), max(1, int(height * scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+    # Converted in place: detection_bgr is a fresh buffer nothing else holds
+    cv2.cvtColor(detection_bgr, cv2.COLOR_BGR2RGB, dst=detection_bgr)
+    return detection_bgr, scale
+
+
+def _scale_face_location(
+    face_location: FaceLocation,
+    detection_scale: float,
+) -> FaceLocation:
+    """Map a face box found on a detection frame back to the full frame."""
+    if detection_scale == 1.0:
+        return face_location
+    top, right, bottom, left = face_location
     return (
-        known_face_encodings,
-        known_student_ids,
-        known_student_names,
-        known_divisions,
+        round(top / detection_scale),
+        round(right / detection_scale),
+        round(bottom / detection_scale),
+        round(left / detection_scale),
+    )
+
+
+def _frame_hash(frame_bgr: np.ndarray) -> int:
+    """
+    Return the 64-bit difference hash (dHash) of *frame_bgr*: one bit per
+    horizontally adjacent pair of pixels on a 9×8 grayscale thumbnail,
+    set where brightness increases to the right.
+    """
+    thumbnail_bgr = cv2.resize(frame_bgr, (9, 8), interpolation=cv2.INTER_AREA)
+    thumbnail_gray = cv2.cvtColor(thumbnail_bgr, cv2.COLOR_BGR2GRAY)
+    brighter_to_right = thumbnail_gray[:, 1:] > thumbnail_gray[:, :-1]
+    return int(np.packbits(brighter_to_right).view(">u8")[0])
+
+
+def _queue_frame(
+    frame_queue: "queue.Queue[Optional[SampledFrame]]",
+    sampled_frame: Optional[SampledFrame],
+    stop_reading: threading.Event,
+) -> bool:
+    """
+    Put *sampled_frame* on *frame_queue*, waiting while it is full.
+    Returns ``False`` if *stop_reading* was set before it fit.
+    """
+    while not stop_reading.is_set():
+        try:
+            frame_queue.put(sampled_frame, timeout=FRAME_QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _grab_sampled_frames(
+    video_capture: cv2.VideoCapture,
+    frame_skip: int,
+    result: VideoProcessingResult,
+    next_frame_number: int = 0,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield ``(frame_number, frame_bgr)`` for every *frame_skip*-th frame,
+    stepping through the video one frame at a time. *next_frame_number*
+    is the zero-based index of the capture's current position.
+    """
+    frame_number = next_frame_number
+    while True:
+        # grab() only advances; the frame is converted to a BGR array
+        # by retrieve(), which is skipped for frames not sampled
+        if not video_capture.grab():
+            # End of video (or read error)
+            return
+
+        result.total_frames_read += 1
+
+        # Only analyse every frame_skip-th frame
+        if frame_number % frame_skip == 0:
+            retrieved, frame_bgr = video_capture.retrieve()
+            if retrieved:
+                yield frame_number, frame_bgr
+        frame_number += 1
+
+
+def _seek_sampled_frames(
+    video_capture: cv2.VideoCapture,
+    frame_skip: int,
+    result: VideoProcessingResult,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield ``(frame_number, frame_bgr)`` for every *frame_skip*-th frame,
+    seeking straight to each one instead of grabbing the frames between.
+
+    ``total_frames_read`` then counts the frames covered, up to and
+    including the last sampled one. Falls back to
+    ``_grab_sampled_frames`` if the capture refuses a seek.
+    """
+    frame_number = 0
+    while True:
+        grabbed, frame_bgr = video_capture.read()
+        if not grabbed:
+            # End of video (or read error)
+            return
+
+        result.total_frames_read = frame_number + 1
+        yield frame_number, frame_bgr
+
+        next_sample_number = frame_number + frame_skip
+        if not video_capture.set(cv2.CAP_PROP_POS_FRAMES, next_sample_number):
+            logger.warning("Video is not seekable — reading every frame instead.")
+            yield from _grab_sampled_frames(
+                video_capture, frame_skip, result, next_frame_number=frame_number + 1
+            )
+            return
+        frame_number = next_sample_number
+
+
+def _read_sampled_frames(
+    video_capture: cv2.VideoCapture,
+    frame_skip: int,
+    frame_queue: "queue.Queue[Optional[SampledFrame]]",
+    stop_reading: threading.Event,
+    result: VideoProcessingResult,
+) -> None:
+    """
+    Reader-thread body: decode the video, queue every *frame_skip*-th
+    frame as a ``SampledFrame`` (with its smaller RGB detection copy),
+    then queue ``None`` to mark the end. Stops early once *stop_reading*
+    is set.
+
+    Frames are reached by grabbing each one in turn, or by seeking
+    straight to each sampled frame when ``seek_to_sampled_frames`` is on.
+
+    With ``skip_duplicate_frames``, a sampled frame whose hash equals the
+    last queued frame's is dropped: matching it again would mark nobody
+    new and only save the same unknown faces twice.
+
+    Only this thread touches ``result.total_frames_read`` and
+    ``result.frames_processed`` until it has been joined.
+    """
+    if settings.seek_to_sampled_frames and frame_skip > 1:
+        sampled_frames = _seek_sampled_frames(video_capture, frame_skip, result)
+    else:
+        sampled_frames = _grab_sampled_frames(video_capture, frame_skip, result)
+
+    previous_frame_hash: Optional[int] = None
+    try:
+        for frame_number, frame_bgr in sampled_frames:
+            if stop_reading.is_set():
+                break
+
+            if settings.skip_duplicate_frames:
+                frame_hash = _frame_hash(frame_bgr)
+                if frame_hash == previous_frame_hash:
+                    continue
+                previous_frame_hash = frame_hash
+
+            result.frames_processed += 1
+            # face_recognition requires RGB
+            detection_rgb, detection_scale = _detection_frame(frame_bgr)
+            sampled_frame = SampledFrame(
+                frame_number=frame_number + 1,
+                frame_bgr=frame_bgr,
+                detection_rgb=detection_rgb,
+                detection_scale=detection_scale,
+            )
+            if not _queue_frame(frame_queue, sampled_frame, stop_reading):
+                break
+    except Exception as read_error:
+        logger.error("Video decoding failed: %s", read_error)
+        result.errors.append(f"Video decoding error — {read_error}")
+    finally:
+        _queue_frame(frame_queue, None, stop_reading)
+
+
+# ──────────────────────────────────────────────
+#  Detection
+# ──────────────────────────────────────────────
+
+
+def _detect_faces(
+    frames_rgb: List[np.ndarray],
+) -> List[Tuple[List[FaceLocation], List[np.ndarray]]]:
+    """
+    Return the face locations and encodings found in each RGB frame.
+
+    With ``settings.use_gpu_batch`` dlib's CNN detector runs once over
+    all the frames via ``batch_face_locations`` (frames of one video
+    share a shape, as dlib's batching requires). Otherwise each frame
+    goes through the HOG detector.
+    """
+    if settings.use_gpu_batch:
+        locations_per_frame = face_recognition.batch_face_locations(
+            frames_rgb,
+            number_of_times_to_upsample=1,
+            batch_size=len(frames_rgb),
+        )
+    else:
+        locations_per_frame = [
+            face_recognition.face_locations(frame_rgb) for frame_rgb in frames_rgb
+        ]
+
+    return [
+        (
+            face_locations,
+            face_recognition.face_encodings(frame_rgb, face_locations)
+            if face_locations
+            else [],
+        )
+        for frame_rgb, face_locations in zip(frames_rgb, locations_per_frame)
+    ]
+
+
+# ──────────────────────────────────────────────
+#  Matching
+# ──────────────────────────────────────────────
+
+
+def _best_matches(
+    known_face_encodings: np.ndarray,
+    face_encodings: List[np.ndarray],
+    similarity_buffer: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return, for every encoding in *face_encodings*, the index of the
+    closest known encoding and the Euclidean distance between the two
+    (both unit-normalised).
+
+    Known rows are unit length, so one matrix product gives the cosine
+    similarity of every face in a frame to every known encoding, reading
+    the known matrix once per frame rather than once per face. The closest
+    row is the most similar one, and only its distance,
+    ``sqrt(2 - 2 * similarity)``, is ever computed.
+
+    The product is a ``float32`` GEMM on contiguous memory, which NumPy
+    hands to BLAS's vectorised (AVX2 / AVX-512) kernel. It is written
+    into the first F rows of *similarity_buffer* (at least F × N,
+    ``float32``), allocated once per video, so matching allocates
+    nothing per face beyond the F probe rows.
+
+    The matrix deliberately stays ``float32`` rather than int8: NumPy has
+    no VNNI-backed integer GEMM, so an int8 product (upcast to int32 or
+    via ``einsum``) runs several times slower than the BLAS kernel. For
+    the same reason there is no hand-written (e.g. Numba) distance loop
+    or kernel generated per roster size: BLAS already vectorises, blocks
+    and threads this product.
+    """
+    face_count = len(face_encodings)
+    similarities = np.matmul(
+        normalise_encodings(np.stack(face_encodings)),
+        known_face_encodings.T,
+        out=similarity_buffer[:face_count],
     )
+    best_match_indices = np.argmax(similarities, axis=1)
+    best_similarities = similarities[np.arange(face_count), best_match_indices]
+    best_distances = np.sqrt(np.maximum(2.0 - 2.0 * best_similarities, 0.0))
+    return best_match_indices, best_distances
 
 
 # ──────────────────────────────────────────────
@@ -99,48 +418,82 @@ def _load_known_encodings() -> Tuple[
 # ──────────────────────────────────────────────
 
 
-def _save_unknown_face(
-    frame_rgb: np.ndarray,
-    face_location: Tuple[int, int, int, int],
-    output_directory: Path,
-    face_index: int,
-) -> Optional[str]:
+def _crop_face(
+    frame_bgr: np.ndarray,
+    face_location: FaceLocation,
+) -> Optional[np.ndarray]:
     """
-    Crop the face region from the frame using NumPy slicing and save
-    it as a JPEG to *output_directory*.
+    Crop the face region from the frame using NumPy slicing.
 
     ``face_location`` is in ``face_recognition``'s format:
         (top, right, bottom, left)
 
     Returns:
-        The filename of the saved image, or ``None`` if saving fails.
+        A copy of the crop (so the full frame can be freed while the crop
+        waits to be written), or ``None`` if it has zero area.
     """
     top, right, bottom, left = face_location
 
     # Ensure coordinates are within frame bounds
-    height, width = frame_rgb.shape[:2]
+    height, width = frame_bgr.shape[:2]
     top = max(0, top)
     left = max(0, left)
     bottom = min(height, bottom)
     right = min(width, right)
 
-    # NumPy slicing to crop the face (per ARCHITECTURE.md)
-    cropped_face_rgb = frame_rgb[top:bottom, left:right]
+    # NumPy slicing to crop the face (per ARCHITECTURE.md). The frame is
+    # still in OpenCV's BGR order, so the crop needs no colour conversion.
+    cropped_face_bgr = frame_bgr[top:bottom, left:right]
 
-    if cropped_face_rgb.size == 0:
+    if cropped_face_bgr.size == 0:
         logger.warning("Cropped face has zero area — skipping save.")
         return None
 
-    # Convert RGB → BGR for OpenCV imwrite
-    cropped_face_bgr = cv2.cvtColor(cropped_face_rgb, cv2.COLOR_RGB2BGR)
+    return cropped_face_bgr.copy()
+
 
-    timestamp_string = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"unknown_{timestamp_string}_{face_index}.jpg"
+def _save_unknown_face(
+    cropped_face_bgr: np.ndarray,
+    output_directory: Path,
+    timestamp_string: str,
+    face_index: int,
+    job_token: str,
+) -> Optional[str]:
+    """
+    Save a cropped face as a JPEG to *output_directory*. Runs on the
+    unknown-face writer pool; OpenCV releases the GIL while encoding.
+
+    Every crop is its own file, not an entry in a per-video archive: the
+    unknown-faces listing scans the directory for images and the
+    ``/static/unknown_faces`` mount serves each one by name.
+
+    *timestamp_string* (``YYYYMMDD_HHMMSS``) is taken once per frame by
+    the caller and shared by every face saved from it.
+
+    *job_token* is unique per ``process_video`` call, so jobs running
+    concurrently in the same second never overwrite each other's crops
+    (the static mount serves them as immutable).
+
+    Returns:
+        The filename of the saved image, or ``None`` if saving fails.
+    """
+    filename = f"unknown_{timestamp_string}_{face_index}_{job_token}.jpg"
     output_path = output_directory / filename
 
-    success = cv2.imwrite(str(output_path), cropped_face_bgr)
+    # Encode in memory, then write the file in a single call
+    success, jpeg_buffer = cv2.imencode(
+        ".jpg",
+        cropped_face_bgr,
+        [int(cv2.IMWRITE_JPEG_QUALITY), UNKNOWN_FACE_JPEG_QUALITY],
+    )
     if not success:
-        logger.error("cv2.imwrite failed for %s", output_path)
+        logger.error("cv2.imencode failed for %s", output_path)
+        return None
+
+    try:
+        output_path.write_bytes(jpeg_buffer)
+    except OSError as write_error:
+        logger.error("Could not write %s: %s", output_path, write_error)
         return None
 
     return filename
@@ -175,7 +528,7 @@ def process_video(video_path: str) -> VideoProcessingResult:
         error_message = f"Video file not found: {video_path}"
         logger.error(error_message)
         result.errors.append(error_message)
-        result.completed_at = datetime.now(tz=timezone.utc)
+        result.completed_at = _utc_now_iso()
         return result
 
     # ── Load known encodings ─────────────────────────────────────
@@ -186,13 +539,19 @@ def process_video(video_path: str) -> VideoProcessingResult:
         known_divisions,
     ) = _load_known_encodings()
 
-    if not known_face_encodings:
+    if len(known_face_encodings) == 0:
         logger.warning(
             "No student encodings loaded — every face will be unknown."
         )
 
+    # Reused by _best_matches for every frame; grown if a frame holds
+    # more faces than any before it
+    similarity_buffer = np.empty(
+        (1, len(known_face_encodings)), dtype=np.float32
+    )
+
     # ── Open the video ───────────────────────────────────────────
-    video_capture = cv2.VideoCapture(str(video_file))
+    video_capture = _open_video_capture(str(video_file))
 
     if not video_capture.isOpened():
         error_message = (
@@ -201,7 +560,7 @@ def process_video(video_path: str) -> VideoProcessingResult:
         )
         logger.error(error_message)
         result.errors.append(error_message)
-        result.completed_at = datetime.now(tz=timezone.utc)
+        result.completed_at = _utc_now_iso()
         _cleanup_temp_video(video_file)
         return result
 
@@ -234,119 +593,187 @@ def process_video(video_path: str) -> VideoProcessingResult:
     unknown_faces_output_dir.mkdir(parents=True, exist_ok=True)
 
     # Track which students have already been marked present
-    # so we don't call mark_student_present() hundreds of times
-    already_marked_student_ids: set = set()
+    # so we don't call mark_student_present() hundreds of times:
+    # one flag per encoding row, so a match is checked by the row index
+    # it returned, and marking a student flags all of their rows.
+    # Their encodings stay in the match matrix on purpose: without them a
+    # marked student seen again would match the nearest *unmarked* student
+    # or be saved as an unknown face.
+    marked_encoding_rows = np.zeros(len(known_face_encodings), dtype=bool)
+    encoding_rows_by_student: Dict[str, List[int]] = {}
+    for row_index, student_id in enumerate(known_student_ids):
+        encoding_rows_by_student.setdefault(student_id, []).append(row_index)
     global_unknown_face_counter: int = 0
+    job_token: str = uuid.uuid4().hex[:8]
+
+    # ── Frame processing loop ────────────────────────────────────
+    # A reader thread decodes and samples the video into a bounded
+    # queue while this thread detects and matches: OpenCV and dlib both
+    # release the GIL, so decoding overlaps with detection.
+    frame_queue: "queue.Queue[Optional[SampledFrame]]" = queue.Queue(
+        maxsize=FRAME_QUEUE_SIZE
+    )
+    stop_reading = threading.Event()
+    reader_thread = threading.Thread(
+        target=_read_sampled_frames,
+        args=(video_capture, frame_skip, frame_queue, stop_reading, result),
+        name="video-frame-reader",
+        daemon=True,
+    )
+    reader_thread.start()
 
-    # ── Frame-by-frame processing loop ───────────────────────────
-    frame_number: int = 0
-
-    while True:
-        grabbed, frame_bgr = video_capture.read()
-
-        if not grabbed:
-            # End of video (or read error)
-            break
-
-        result.total_frames_read += 1
-
-        # Skip frames we don't need to analyse
-        if frame_number % frame_skip != 0:
-            frame_number += 1
-            continue
-
-        frame_number += 1
-        result.frames_processed += 1
-
-        # Convert BGR → RGB (face_recognition requires RGB)
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-        # ── Detect faces & extract encodings ─────────────────────
-        try:
-            face_locations = face_recognition.face_locations(frame_rgb)
-            face_encodings = face_recognition.face_encodings(
-                frame_rgb, face_locations
-            )
-        except Exception as detection_error:
-            logger.warning(
-                "Face detection failed on frame %d: %s",
-                frame_number,
-                detection_error,
-            )
-            result.errors.append(
-                f"Frame {frame_number}: detection error — {detection_error}"
-            )
-            continue
-
-        if not face_locations:
-            # No faces in this frame — move on
-            continue
-
-        result.faces_detected += len(face_encodings)
+    # Unknown faces are cropped here but JPEG-encoded and written on a
+    # small pool, so disk I/O overlaps with detection of later frames.
+    unknown_face_writer = ThreadPoolExecutor(
+        max_workers=UNKNOWN_FACE_WRITER_THREADS,
+        thread_name_prefix="unknown-face-writer",
+    )
+    unknown_face_writes: List["Future[Optional[str]]"] = []
 
-        # ── Match each detected face ─────────────────────────────
-        for face_index, (face_encoding, face_location) in enumerate(
-            zip(face_encodings, face_locations)
-        ):
-            matched = False
+    # Sampled frames are buffered and detected frame_batch_size at a
+    # time (see _detect_faces): one frame at a time on the HOG path.
+    frame_batch_size = FRAME_BATCH_SIZE if settings.use_gpu_batch else 1
+    pending_frames: List[SampledFrame] = []
+    end_of_video = False
 
-            if known_face_encodings:
-                # Compute Euclidean distances to every known encoding
-                face_distances = face_recognition.face_distance(
-                    known_face_encodings, face_encoding
+    try:
+        while not end_of_video:
+            sampled_frame = frame_queue.get()
+
+            if sampled_frame is None:
+                # End of video (or read error): flush the buffered frames
+                end_of_video = True
+            else:
+                pending_frames.append(sampled_frame)
+
+            if not pending_frames or (
+                not end_of_video and len(pending_frames) < frame_batch_size
+            ):
+                continue
+
+            # ── Detect faces & extract encodings ─────────────────────
+            try:
+                detections = _detect_faces(
+                    [
+                        pending_frame.detection_rgb
+                        for pending_frame in pending_frames
+                    ]
                 )
-
-                best_match_index = int(np.argmin(face_distances))
-                best_distance = face_distances[best_match_index]
-
-                if best_distance <= settings.face_match_threshold:
-                    matched = True
-                    matched_student_id = known_student_ids[best_match_index]
-                    matched_student_name = known_student_names[best_match_index]
-                    matched_division = known_divisions[best_match_index]
-
-                    if matched_student_id not in already_marked_student_ids:
-                        try:
-                            mark_student_present(
-                                student_id=matched_student_id,
-                                student_name=matched_student_name,
-                                division=matched_division,
-                            )
-                            already_marked_student_ids.add(matched_student_id)
-                            result.students_matched += 1
-                            logger.info(
-                                "Marked present: %s (%s) — distance %.3f",
-                                matched_student_name,
-                                matched_student_id,
-                                best_distance,
-                            )
-                        except Exception as csv_error:
-                            logger.error(
-                                "Failed to mark attendance for %s: %s",
-                                matched_student_id,
-                                csv_error,
-                            )
-                            result.errors.append(
-                                f"CSV write error for {matched_student_id}: "
-                                f"{csv_error}"
+            except Exception as detection_error:
+                for failed_frame in pending_frames:
+                    logger.warning(
+                        "Face detection failed on frame %d: %s",
+                        failed_frame.frame_number,
+                        detection_error,
+                    )
+                    result.errors.append(
+                        f"Frame {failed_frame.frame_number}: detection error — "
+                        f"{detection_error}"
+                    )
+                pending_frames.clear()
+                continue
+
+            for pending_frame, (face_locations, face_encodings) in zip(
+                pending_frames, detections
+            ):
+                if not face_locations:
+                    # No faces in this frame — move on
+                    continue
+
+                result.faces_detected += len(face_encodings)
+                # Names every unknown face saved from this frame
+                frame_timestamp_string = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+                # ── Match every face in the frame at once ────────────────
+                if len(known_face_encodings) > 0:
+                    if len(face_encodings) > similarity_buffer.shape[0]:
+                        similarity_buffer = np.empty(
+                            (len(face_encodings), len(known_face_encodings)),
+                            dtype=np.float32,
+                        )
+                    best_match_indices, best_distances = _best_matches(
+                        known_face_encodings, face_encodings, similarity_buffer
+                    )
+
+                for face_index, face_location in enumerate(face_locations):
+                    matched = False
+
+                    if len(known_face_encodings) > 0:
+                        best_match_index = int(best_match_indices[face_index])
+                        best_distance = float(best_distances[face_index])
+
+                        if best_distance <= settings.face_match_threshold:
+                            matched = True
+                            matched_student_id = known_student_ids[best_match_index]
+                            matched_student_name = known_student_names[best_match_index]
+                            matched_division = known_divisions[best_match_index]
+
+                            if not marked_encoding_rows[best_match_index]:
+                                try:
+                                    mark_student_present(
+                                        student_id=matched_student_id,
+                                        student_name=matched_student_name,
+                                        division=matched_division,
+                                    )
+                                    marked_encoding_rows[
+                                        encoding_rows_by_student[matched_student_id]
+                                    ] = True
+                                    result.students_matched += 1
+                                    logger.info(
+                                        "Marked present: %s (%s) — distance %.3f",
+                                        matched_student_name,
+                                        matched_student_id,
+                                        best_distance,
+                                    )
+                                except Exception as csv_error:
+                                    logger.error(
+                                        "Failed to mark attendance for %s: %s",
+                                        matched_student_id,
+                                        csv_error,
+                                    )
+                                    result.errors.append(
+                                        f"CSV write error for {matched_student_id}: "
+                                        f"{csv_error}"
+                                    )
+
+                    if not matched:
+                        # Unknown face → crop now, save in the background
+                        cropped_face_bgr = _crop_face(
+                            pending_frame.frame_bgr,
+                            _scale_face_location(
+                                face_location, pending_frame.detection_scale
+                            ),
+                        )
+                        if cropped_face_bgr is not None:
+                            unknown_face_writes.append(
+                                unknown_face_writer.submit(
+                                    _save_unknown_face,
+                                    cropped_face_bgr=cropped_face_bgr,
+                                    output_directory=unknown_faces_output_dir,
+                                    timestamp_string=frame_timestamp_string,
+                                    face_index=global_unknown_face_counter,
+                                    job_token=job_token,
+                                )
                             )
+                            global_unknown_face_counter += 1
 
-            if not matched:
-                # Unknown face → crop and save
-                saved_filename = _save_unknown_face(
-                    frame_rgb=frame_rgb,
-                    face_location=face_location,
-                    output_directory=unknown_faces_output_dir,
-                    face_index=global_unknown_face_counter,
-                )
-                if saved_filename:
-                    global_unknown_face_counter += 1
-                    result.unknown_faces_saved += 1
-                    logger.info("Saved unknown face: %s", saved_filename)
+            pending_frames.clear()
+
+    finally:
+        # Unblocks the reader if this loop stopped early
+        stop_reading.set()
+        reader_thread.join()
+        unknown_face_writer.shutdown(wait=True)
+
+    for unknown_face_write in unknown_face_writes:
+        saved_filename = unknown_face_write.result()
+        if saved_filename:
+            result.unknown_faces_saved += 1
+            logger.info("Saved unknown face: %s", saved_filename)
 
     # ── Release resources ────────────────────────────────────────
     video_capture.release()
-    result.completed_at = datetime.now(tz=timezone.utc)
+    result.completed_at = _utc_now_iso()
 
     logger.info(
         "Video processing complete: %d frames read, %d processed, "
@@ -19,6 +19,7 @@ import Link from "next/link";
 import PageHeader from "@/components/PageHeader";
 import {
   apiUrl,
+  wsUrl,
   type VideoUploadResponse,
   type JobStatusResponse,
   type ErrorResponse,
@@ -39,6 +40,7 @@ export default function UploadVideoPage(): React.JSX.Element {
   const [jobResult, setJobResult] = useState<JobStatusResponse | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
   const pollIntervalRef = useRef<NodeJS.Timeout | null>(null);
+  const jobSocketRef = useRef<WebSocket | null>(null);
 
   /* ── File validation using extension (more reliable than MIME) ── */
   const isValidVideoFile = useCallback((file: File): boolean => {
@@ -100,7 +102,31 @@ export default function UploadVideoPage(): React.JSX.Element {
     [handleFileSelect]
   );
 
-  /* ── Job status polling ─────────────────────────── */
+  /* ── Job status updates (WebSocket, polling fallback) ── */
+  /** Apply a status update; returns true once the job has finished. */
+  const applyJobUpdate = useCallback((data: JobStatusResponse): boolean => {
+    setJobResult(data);
+
+    if (data.status === "completed" || data.status === "failed") {
+      setUploadStatus(data.status === "completed" ? "success" : "error");
+      if (data.status === "failed") {
+        setResponseMessage(data.error || "Processing failed unexpectedly.");
+      }
+      return true;
+    }
+    return false;
+  }, []);
+
+  const stopWatchingJob = useCallback((): void => {
+    if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
+    pollIntervalRef.current = null;
+    if (jobSocketRef.current) {
+      jobSocketRef.current.onclose = null;
+      jobSocketRef.current.close();
+      jobSocketRef.current = null;
+    }
+  }, []);
+
   const startPolling = useCallback((id: string) => {
     if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
 
@@ -109,27 +135,39 @@ export default function UploadVideoPage(): React.JSX.Element {
         const response = await fetch(apiUrl(`/api/attendance/job-status/${id}`));
         if (!response.ok) return;
         const data: JobStatusResponse = await response.json();
-        setJobResult(data);
-
-        if (data.status === "completed" || data.status === "failed") {
-          if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
-          setUploadStatus(data.status === "completed" ? "success" : "error");
-          if (data.status === "failed") {
-            setResponseMessage(data.error || "Processing failed unexpectedly.");
-          }
+
+        if (applyJobUpdate(data) && pollIntervalRef.current) {
+          clearInterval(pollIntervalRef.current);
         }
       } catch {
         // Silently retry on network errors
       }
     }, 2000);
-  }, []);
+  }, [applyJobUpdate]);
 
-  // Cleanup polling on unmount
-  useEffect(() => {
-    return () => {
-      if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
+  const watchJob = useCallback((id: string) => {
+    stopWatchingJob();
+
+    let jobFinished = false;
+    const socket = new WebSocket(wsUrl(`/api/attendance/job-status/ws/${id}`));
+    jobSocketRef.current = socket;
+
+    socket.onmessage = (event: MessageEvent<string>) => {
+      const data = JSON.parse(event.data);
+      // Error bodies ({ success: false, error }) carry no status
+      if ("status" in data) jobFinished = applyJobUpdate(data as JobStatusResponse);
     };
-  }, []);
+    socket.onclose = () => {
+      jobSocketRef.current = null;
+      // Socket refused or dropped before the job finished — poll instead
+      if (!jobFinished) startPolling(id);
+    };
+  }, [applyJobUpdate, startPolling, stopWatchingJob]);
+
+  // Stop status updates on unmount
+  useEffect(() => {
+    return () => stopWatchingJob();
+  }, [stopWatchingJob]);
 
   /* ── Upload handler ─────────────────────────────── */
   const handleUpload = async (): Promise<void> => {
@@ -157,7 +195,7 @@ export default function UploadVideoPage(): React.JSX.Element {
       setJobId(data.job_id);
       setUploadStatus("processing");
       setResponseMessage(data.message);
-      startPolling(data.job_id);
+      watchJob(data.job_id);
     } catch (uploadError) {
       const message =
         uploadError instanceof Error
@@ -169,7 +207,7 @@ export default function UploadVideoPage(): React.JSX.Element {
   };
 
   const handleReset = (): void => {
-    if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
+    stopWatchingJob();
     setSelectedFile(null);
     setUploadStatus("idle");
     setResponseMessage("");
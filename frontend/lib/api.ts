@@ -16,6 +16,14 @@ export function apiUrl(path: string): string {
   return `${API_BASE_URL}${path}`;
 }
 
+/**
+ * Construct a WebSocket URL for a backend path (http → ws, https → wss).
+ * @example wsUrl("/api/attendance/job-status/ws/abc123") → "ws://localhost:8000/api/attendance/job-status/ws/abc123"
+ */
+export function wsUrl(path: string): string {
+  return `${API_BASE_URL.replace(/^http/, "ws")}${path}`;
+}
+
 /**
  * Construct a full static-file URL for backend-hosted assets.
  * @example staticUrl("/static/unknown_faces/unknown_20250610_143025_0.jpg")